@@ -11,6 +11,17 @@ PSD转网页素材提取工具 - 增强版
 # 安装
 pip install psd-tools pillow
 
+# 可选：安装tqdm后导出时显示进度条，安装orjson可加快metadata.json生成
+pip install tqdm orjson
+
+# 可选：安装pyspng-seunglab后用libspng编码PNG
+pip install pyspng-seunglab
+
+# 可选：用Pillow-SIMD替换Pillow，栅格化和PNG编码约快2倍（需要本地编译）
+# -mavx2 仅适用于支持AVX2的CPU，CI或旧机器上去掉该参数（退回SSE4）
+pip uninstall pillow
+CC="cc -mavx2" pip install pillow-simd --force-reinstall
+
 # 使用（生成AI友好文档）
 python psd_to_web_ai.py 设计图.psd ./输出目录
 ```
@@ -29,17 +40,38 @@ python psd_to_web_ai.py 设计图.psd ./输出目录
 ```bash
 --invisible     # 导出隐藏图层
 --font 字体路径 # 解决文字乱码（如C:/Windows/Fonts/simhei.ttf）
+--jobs N        # 并行导出的进程数，默认使用全部CPU核心
+--flatten       # 只导出PSD内嵌的整张合成图 composite.png
+--oxipng        # 导出后用oxipng进一步无损压缩PNG（需要安装oxipng）
+--png-level N   # PNG压缩级别0-9，默认1最快，9文件最小但导出较慢
+--no-html       # 不生成preview.html和web_layout_guide.html
+--quiet         # 不显示导出进度，只输出汇总信息
 ```
 
 ### ❗常见问题
 - **文字乱码**：用--font指定中文字体
 - **图层缺失**：加--invisible参数
 - **AI位置不准**：提示词强调“严格按坐标"""
+import gc
+import io
 import os
+import re
 import sys
 import json
+import shutil
+import string
+import hashlib
+import html
 import argparse
+import subprocess
 import traceback
+from collections import Counter, namedtuple
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -47,19 +79,92 @@ from enum import Enum
 
 try:
     from psd_tools import PSDImage
+    import PIL
     from PIL import Image, ImageDraw, ImageFont
 except ImportError as e:
     print(f"❌ 导入错误: {e}")
     print("请安装依赖: pip install psd-tools pillow")
+    print("(可选加速: pip uninstall pillow && CC=\"cc -mavx2\" pip install pillow-simd)")
     sys.exit(1)
 
+try:
+    from tqdm import tqdm
+    # 不启动tqdm的监控线程：进程池用fork启动工作进程时，主进程必须只有一个线程
+    tqdm.monitor_interval = 0
+except ImportError:
+    tqdm = None  # 可选依赖：未安装时退化为定期打印进度
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # 可选依赖：未安装时使用标准库json
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # 可选依赖：未安装时不生成调色板PNG，也不使用pyspng
+
+try:
+    import pyspng  # pyspng-seunglab 提供 encode()，原版pyspng只能解码
+    if not hasattr(pyspng, 'encode') or np is None:
+        pyspng = None
+except ImportError:
+    pyspng = None  # 可选依赖：未安装时使用PIL编码PNG
+
+# Pillow-SIMD与Pillow接口完全兼容，版本号带有 .postN 后缀
+PILLOW_VARIANT = f"{'Pillow-SIMD' if '.post' in PIL.__version__ else 'Pillow'} {PIL.__version__}"
+
+# Pillow默认把释放的像素内存直接还给系统，逐层栅格化/裁剪/文字画布会反复申请大块内存；
+# 保留少量内存块（每块最多16MB）供下一个图层复用。用户设置了PILLOW_BLOCKS_MAX时不覆盖
+_PIL_BLOCKS_MAX = 8
+if 'PILLOW_BLOCKS_MAX' not in os.environ and hasattr(Image.core, 'set_blocks_max'):
+    Image.core.set_blocks_max(_PIL_BLOCKS_MAX)
+
+
+def _dump_json_bytes(data):
+    """序列化为缩进2格的UTF-8 JSON字节，优先使用C实现的orjson"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class LayerProgress:
+    """图层导出进度：有tqdm时显示进度条，否则每隔若干图层打印一行，避免逐层刷新终端
+
+    quiet为True时不输出任何进度。
+    """
+
+    def __init__(self, total, interval=20, quiet=False):
+        self.total = total
+        self.interval = interval
+        self.quiet = quiet
+        self.done = 0
+        self.bar = tqdm(total=total, desc="  导出图层", unit="层") if tqdm and not quiet else None
+
+    def update(self):
+        self.done += 1
+        if self.bar:
+            self.bar.update()
+        elif not self.quiet and (self.done % self.interval == 0 or self.done == self.total):
+            print(f"  进度: {self.done}/{self.total}")
+
+    def close(self):
+        if self.bar:
+            self.bar.close()
+
 
 class LayerProcessor:
     """图层处理器"""
 
     def __init__(self, font_path=None):
         self.font_cache = {}
+        # 渲染当前图层时产生的警告（如字体加载失败），由调用方取走后统一输出
+        self.warnings = []
         self.default_font = self._find_system_font(font_path)
+        # 本进程已编码过的像素摘要，重复图层不再重新编码
+        self.encoded_digests = set()
+        # 已渲染的图层数，用于定期回收psd-tools留下的循环引用
+        self.rendered_count = 0
 
     def _find_system_font(self, custom_font_path):
         """查找字体文件"""
@@ -78,89 +183,896 @@ class LayerProcessor:
                 return path
         return None
 
-    def get_font(self, size):
-        """获取字体对象"""
+    def get_font(self, size, text=''):
+        """获取字体对象（按取整后的字号和排版引擎缓存）
+
+        加载失败时返回None（用Pillow默认字体绘制），警告只记录一次；失败结果同样缓存，不再重复尝试加载。
+        """
         if not self.default_font:
             return None
 
-        cache_key = f"{self.default_font}_{size}"
+        # 只有阿拉伯文、印度系等文字需要Raqm做字形整形，其余文字用BASIC布局更快；
+        # None表示交给Pillow选择（有Raqm时用Raqm）
+        layout = None if _COMPLEX_SCRIPT_RE.search(text) else ImageFont.Layout.BASIC
+        # PSD中的字号常带小数，取整后再缓存，避免同一字号产生多个FreeType实例；
+        # 字号不是数值时按12号处理，不能因为缓存键算不出来而丢掉整个图层
+        try:
+            pixel_size = max(int(round(size)), 1)
+        except (TypeError, ValueError, OverflowError):
+            pixel_size = 12
+        cache_key = (pixel_size, layout)
         if cache_key not in self.font_cache:
             try:
-                self.font_cache[cache_key] = ImageFont.truetype(self.default_font, size)
+                self.font_cache[cache_key] = ImageFont.truetype(
+                    self.default_font, cache_key[0], layout_engine=layout)
             except Exception as e:
-                print(f"⚠️ 字体加载失败: {e}")
-                return None
+                self.font_cache[cache_key] = None
+                self.warnings.append(f"字体加载失败，文字改用默认字体: {self.default_font} - {e}")
 
         return self.font_cache[cache_key]
 
+    def pop_warnings(self):
+        """取走并清空已记录的警告"""
+        warnings, self.warnings = self.warnings, []
+        return warnings
+
     def rasterize_text_layer(self, layer):
-        """栅格化文字图层"""
-        try:
-            # 首先尝试使用psd-tools的内置方法
-            if hasattr(layer, 'topil'):
-                pil_image = layer.topil()
-                if pil_image:
-                    return pil_image
+        """栅格化文字图层，返回 (图像, 相对图层左上角的偏移)，没有图像时返回None
+
+        出错时直接抛出异常，由调用方记入错误列表，不在这里打印（工作进程中打印会打乱进度条）。
+        """
+        # 首先尝试使用psd-tools的内置方法
+        if hasattr(layer, 'topil'):
+            pil_image = layer.topil()
+            if pil_image:
+                return pil_image, (0, 0)
+
+        # 备用方法：手动创建文字图像
+        text = getattr(layer, 'text', '')
+        if not text:
+            return None
 
-            # 备用方法：手动创建文字图像
-            text = getattr(layer, 'text', '')
-            if not text:
-                return None
+        font_size = _text_font_size(layer) or 12
+        color = (0, 0, 0, 255)
+        font = self.get_font(font_size, text)
+
+        # 画布按字形实际范围分配，避免大块透明区域拖慢编码；文字原点仍在图层左上角，
+        # 字形相对原点的偏移随结果返回，由调用方换算导出图片的位置
+        text_bbox = _MEASURE_DRAW.textbbox((0, 0), text, font=font)
+        width = max(text_bbox[2] - text_bbox[0], 1)
+        height = max(text_bbox[3] - text_bbox[1], 1)
 
-            bbox = layer.bbox
-            width = max(bbox[2] - bbox[0], 1)
-            height = max(bbox[3] - bbox[1], 1)
+        image = Image.new('RGBA', (width, height), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(image, 'RGBA')
+        draw.text((-text_bbox[0], -text_bbox[1]), text, fill=color, font=font)
+
+        return image, text_bbox[:2]
+
+    def export_layer_image(self, layer):
+        """导出图层图像，返回 (图像, 偏移(0, 0))，没有图像时返回None；出错时直接抛出异常由调用方记录"""
+        # 图层的topil()直接合并通道数据，不经过去白底处理（那一步只作用于PSDImage整图合成），
+        # 这里不要改用psd.topil()/composite()来取图层像素
+        if hasattr(layer, 'topil'):
+            image = layer.topil()
+            if image:
+                return image, (0, 0)
+        return None
 
-            font_size = getattr(layer, 'size', 12)
-            color = (0, 0, 0, 255)
 
-            image = Image.new('RGBA', (width, height), (255, 255, 255, 0))
-            draw = ImageDraw.Draw(image)
+def _text_font_size(layer):
+    """从文字引擎数据中读取第一段文字的字号（已乘以文字变换的纵向缩放），读不到时返回None
+
+    注意 layer.size 是psd-tools图层的 (宽, 高)，不是字号。
+    """
+    try:
+        style = layer.engine_dict['StyleRun']['RunArray'][0]['StyleSheet']['StyleSheetData']
+        size = float(style['FontSize'])
+        transform = getattr(layer, 'transform', None)
+        if transform:
+            # 变换矩阵为 (xx, xy, yx, yy, tx, ty)，文字缩放后字号要按纵向比例换算
+            size *= (transform[2] ** 2 + transform[3] ** 2) ** 0.5
+    except Exception:
+        return None
+    return round(size, 2) if size > 0 else None
+
+
+# 只用于测量文字范围的1×1画布
+_MEASURE_DRAW = ImageDraw.Draw(Image.new('L', (1, 1)))
+
+_PNG_NATIVE_MODES = ('RGBA', 'RGB', 'LA', 'L', 'P')
+
+# 预览页图片框约为 280×200，按2倍尺寸生成缩略图
+THUMBNAIL_SIZE = (560, 400)
+# 256像素以内的小缩略图用双线性插值即可，肉眼看不出差别且快得多；更大的缩略图保留Lanczos
+_THUMBNAIL_RESAMPLE = (Image.Resampling.BILINEAR if max(THUMBNAIL_SIZE) <= 256
+                       else Image.Resampling.LANCZOS)
+
+# 需要复杂字形整形的文字：希伯来文、阿拉伯文、印度系文字、泰文、藏文、缅甸文、高棉文
+_COMPLEX_SCRIPT_RE = re.compile('[\u0590-\u08ff\u0900-\u0dff\u0e00-\u0fff\u1000-\u109f\u1780-\u17ff]')
+
+# 文件名中不允许出现的字符统一替换为下划线（str.translate查表，不走正则）
+_ILLEGAL_FILENAME_TABLE = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+
+
+def _encode_thumbnail(image):
+    """生成预览页用的WebP缩略图字节；图像不超过缩略图尺寸或编码失败时返回None"""
+    if image.width <= THUMBNAIL_SIZE[0] and image.height <= THUMBNAIL_SIZE[1]:
+        return None
+
+    try:
+        thumb = image.copy() if image.mode in ('RGB', 'RGBA') else image.convert('RGBA')
+        thumb.thumbnail(THUMBNAIL_SIZE, _THUMBNAIL_RESAMPLE)
+        buffer = io.BytesIO()
+        thumb.save(buffer, 'WEBP', quality=80, method=4)
+        return buffer.getvalue()
+    except Exception:
+        # 缩略图只用于预览页，失败时预览页直接引用原图
+        return None
+
+
+# 只有颜色不超过这么多种的图层才转为调色板PNG。图标、纯色形状通常只有几种颜色；
+# 渐变、阴影等有上百种颜色的图层转调色板既不更小也不更快，getcolors在超出上限时会立即放弃
+_PALETTE_MAX_COLORS = 16
+
+
+def _pack_pixels(pixels):
+    """把 (..., 3或4) 的uint8像素数组打包成uint32，便于整体比较颜色"""
+    pixels = np.ascontiguousarray(pixels)
+    if pixels.shape[-1] == 4:
+        return pixels.view(np.uint32)[..., 0]
+    return ((pixels[..., 0].astype(np.uint32) << 16)
+            | (pixels[..., 1].astype(np.uint32) << 8)
+            | pixels[..., 2])
+
+
+def _palettize(image):
+    """颜色很少时无损转换为调色板图像，否则（或没有numpy时）返回None
+
+    调色板直接由getcolors得到的颜色构成，每个像素按颜色查到自己的序号，转换本身就是无损的。
+    """
+    if np is None or image.mode not in ('RGBA', 'RGB'):
+        return None
+
+    colors = image.getcolors(_PALETTE_MAX_COLORS)
+    if not colors:
+        return None
+
+    palette = np.array([color for _, color in colors], dtype=np.uint8)
+    keys = _pack_pixels(palette)
+    order = np.argsort(keys)
+    indices = np.searchsorted(keys[order], _pack_pixels(np.asarray(image))).astype(np.uint8)
+
+    paletted = Image.frombytes('P', image.size, indices.tobytes())
+    # RGBA调色板写PNG时会带上tRNS块，半透明颜色同样保留
+    paletted.putpalette(palette[order].tobytes(), rawmode=image.mode)
+    return paletted
+
+
+def _encode_png(image, compress_level):
+    """编码PNG字节：装了pyspng时交给libspng，否则使用PIL"""
+    # 调色板图像需要写PLTE块，只有PIL能处理
+    if pyspng and image.mode != 'P':
+        return pyspng.encode(np.asarray(image), pyspng.ProgressiveMode.NONE, compress_level)
+
+    buffer = io.BytesIO()
+    # optimize=True 会额外跑一遍zlib最高压缩，低压缩级别仍是无损PNG但编码快得多
+    image.save(buffer, 'PNG', compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def _write_file(path, data):
+    """直接通过文件描述符写入已编码的字节，不经过Python的缓冲文件对象"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
-            font = self.get_font(font_size)
-            if font:
-                draw.text((0, 0), text, fill=color, font=font)
+
+# 各图层类型的栅格化方法，未列出的类型直接导出图层像素；
+# 返回 (图像, 图像左上角相对图层bbox左上角的偏移)，没有图像时返回None
+_RENDER_HANDLERS = {
+    'text': LayerProcessor.rasterize_text_layer,
+}
+
+# 每渲染这么多个图层做一次完整的垃圾回收
+_GC_INTERVAL = 32
+
+
+def _render_layer(processor, layer, layer_type, options):
+    """栅格化单个图层并编码，返回 (PNG字节, 缩略图字节, 像素摘要, 位置)，无图像时返回None
+
+    位置为导出图片在画布上的 (x, y, 宽, 高)，与PNG的实际尺寸一致（裁剪后会与图层bbox不同）。
+
+    像素与本进程之前编码过的图层完全相同时不再编码，两种字节都返回None，
+    由主进程按摘要复制已写出的文件。
+    """
+    if layer_type == 'smart_object' and options['expand_smart_objects']:
+        return None
+    render = _RENDER_HANDLERS.get(layer_type, LayerProcessor.export_layer_image)
+    rendered = render(processor, layer)
+    if not rendered:
+        return None
+    image, offset = rendered
+
+    try:
+        # 部分psd-tools版本返回整张画布大小的图像，图层外全是透明像素，先裁剪到图层范围再编码
+        bbox = tuple(layer.bbox)
+        origin = (bbox[0] + offset[0], bbox[1] + offset[1])
+        if image.size == options['canvas_size'] and image.size != (bbox[2] - bbox[0], bbox[3] - bbox[1]):
+            # 超出画布的部分在整画布图像中并不存在，裁剪框要限制在画布内
+            crop_box = (max(bbox[0], 0), max(bbox[1], 0),
+                        min(bbox[2], image.width), min(bbox[3], image.height))
+            if crop_box[2] > crop_box[0] and crop_box[3] > crop_box[1]:
+                cropped = image.crop(crop_box)
+                image.close()
+                image = cropped
+                origin = crop_box[:2]
             else:
-                draw.text((0, 0), text, fill=color)
+                origin = (0, 0)
+        box = (*origin, image.width, image.height)
+
+        # PNG编码器原生支持这些模式，只有CMYK等其他模式才需要整图转换
+        if image.mode not in _PNG_NATIVE_MODES:
+            converted = image.convert('RGBA')
+            image.close()
+            image = converted
+
+        hasher = hashlib.blake2b(f"{image.mode}{image.size}".encode(), digest_size=16)
+        hasher.update(image.tobytes())
+        digest = hasher.hexdigest()
+        if digest in processor.encoded_digests:
+            return None, None, digest, box
+
+        # 颜色很少的图层（图标、纯色形状等）无损转为调色板PNG，体积和编码耗时都更小
+        paletted = _palettize(image)
+        png_data = _encode_png(paletted or image, options['png_compress_level'])
+        if paletted:
+            paletted.close()
+        thumb_data = _encode_thumbnail(image) if options['generate_html'] else None
+        processor.encoded_digests.add(digest)
+        return png_data, thumb_data, digest, box
+    finally:
+        # 编码完立即释放像素缓冲区，峰值内存只取决于单个最大图层而不是所有图层之和
+        image.close()
+        processor.rendered_count += 1
+        if processor.rendered_count % _GC_INTERVAL == 0:
+            gc.collect()
+
+
+# 每次调用oxipng处理的文件数（Windows命令行长度上限约32K字符）
+_OXIPNG_BATCH = 200
+
+# 进程池每次派发给工作进程的图层数
+_POOL_CHUNKSIZE = 4
+
+def _can_fork():
+    """能否用fork启动工作进程：只在Linux上使用（macOS的系统框架在fork后不安全），
+    且当前进程只有主线程，否则子进程可能继承到被其他线程持有的锁"""
+    return (sys.platform.startswith('linux')
+            and 'fork' in multiprocessing.get_all_start_methods()
+            and threading.active_count() == 1)
+
+
+# 工作进程内的状态：每个进程只打开一次PSD
+_worker_state = {}
+
+
+def _init_layer_worker(shm_name, psd_size, font_path, options):
+    """进程池初始化：从主进程的共享内存中解析PSD并创建图层处理器"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        psd = PSDImage.open(io.BytesIO(shm.buf[:psd_size]))
+    finally:
+        shm.close()
+    _worker_state['layers'] = list(psd.descendants())
+    _worker_state['processor'] = LayerProcessor(font_path)
+    _worker_state['options'] = options
+
+
+def _process_one_layer(task):
+    """在工作进程中处理一个图层，返回 (渲染结果, 错误信息, 警告列表)"""
+    index, layer_type = task
+    processor = _worker_state['processor']
+    try:
+        layer = _worker_state['layers'][index]
+        rendered = _render_layer(processor, layer, layer_type, _worker_state['options'])
+        return rendered, None, processor.pop_warnings()
+    except Exception as e:
+        return None, str(e), processor.pop_warnings()
 
-            return image
 
-        except Exception as e:
-            print(f"⚠️ 文字栅格化失败: {e}")
-            return None
+# 图层基础属性快照：加载时从psd-tools读取一次，之后各处直接读元组字段
+LayerMeta = namedtuple('LayerMeta', ['name', 'bbox', 'kind', 'visible', 'opacity', 'blend_mode',
+                                     'is_smart', 'has_pixels'])
 
-    def export_layer_image(self, layer):
-        """导出图层图像"""
-        try:
-            if hasattr(layer, 'topil'):
-                image = layer.topil()
-                if image:
-                    return image
-            return None
-        except Exception as e:
-            print(f"⚠️ 图层导出失败: {e}")
-            return None
+
+def _fmt_enum(value, default):
+    """枚举属性（混合模式等）输出为小写名称，如 BlendMode.NORMAL -> 'normal'
+
+    名称经 sys.intern 驻留，同一模式的所有图层共用一个字符串对象。
+    """
+    if value is None:
+        return default
+    if isinstance(value, Enum):
+        return sys.intern(value.name.lower())
+    return str(value)
+
+
+def _snapshot_layer(index, layer):
+    """读取图层的基础属性"""
+    return LayerMeta(
+        name=getattr(layer, 'name', f"layer_{index}"),
+        bbox=tuple(layer.bbox),
+        kind=getattr(layer, 'kind', None),
+        visible=layer.is_visible() if hasattr(layer, 'is_visible') else True,
+        opacity=getattr(layer, 'opacity', 100),
+        blend_mode=_fmt_enum(getattr(layer, 'blend_mode', None), 'normal'),
+        is_smart=bool(getattr(layer, 'smart_object', None)),
+        has_pixels=hasattr(layer, 'has_pixels') and layer.has_pixels()
+    )
+
+
+@dataclass(slots=True)
+class LayerResult:
+    """单个已导出图层的结果，各输出生成器直接读取属性"""
+    index: int
+    name: str
+    type: str
+    filename: str
+    relative_path: str
+    thumbnail_relative_path: str
+    absolute_path: str
+    x: int
+    y: int
+    width: int
+    height: int
+    visible: bool
+    opacity: int
+    blend_mode: str
+    bbox: tuple
+    text_info: dict = field(default_factory=dict)
+
+    def to_dict(self):
+        """转换为metadata.json中的图层结构（仅在写JSON时调用一次）"""
+        left, top, right, bottom = self.bbox
+        return {
+            'index': self.index,
+            'name': self.name,
+            'type': self.type,
+            'text_info': self.text_info,
+            'filename': self.filename,
+            'relative_path': self.relative_path,
+            'thumbnail_relative_path': self.thumbnail_relative_path,
+            'absolute_path': self.absolute_path,
+            'position': {'x': self.x, 'y': self.y, 'width': self.width, 'height': self.height},
+            'visibility': {'visible': self.visible, 'exported': True},
+            'opacity': self.opacity,
+            'blend_mode': self.blend_mode,
+            'layer_bbox': {
+                'left': left, 'top': top,
+                'right': right, 'bottom': bottom
+            }
+        }
+
+
+def _row_iter(results):
+    """逐个产出metadata.csv的数据行"""
+    for result in results:
+        yield (result.index, result.name, result.type,
+               result.text_info.get('text_content', ''),
+               result.filename, result.relative_path,
+               result.x, result.y, result.width, result.height,
+               result.opacity,
+               '可见' if result.visible else '隐藏',
+               result.blend_mode, result.index)
+
+
+# ai_summary.txt开头的AI提示词，内容固定不变
+_AI_SUMMARY_HEADER = '''# 🎯 AI网页生成任务说明
+
+## 任务目标
+请根据以下PSD设计稿的详细说明，生成一个**与原始设计图完全一致**的HTML网页。
+
+## 核心要求
+
+### 1. 精确还原
+- **尺寸精确**: 严格按照说明中的`设计尺寸`设置容器宽度和高度
+- **位置精确**: 每个图层必须按照说明中的`位置坐标`进行绝对定位
+- **大小精确**: 每个图层的`宽度`和`高度`必须与说明完全一致
+- **层级精确**: 严格按照`层级(Z-index)`顺序排列，数值越大越靠上
+
+### 2. 图片资源
+- **图片路径**: 所有图片都存放在`images/`目录下
+- **引用方式**: 使用相对路径，例如 `<img src="images/001_logo.png">`
+- **图片格式**: 所有图片都是PNG格式，已保留透明通道
+
+### 3. 布局方式
+- **容器设置**:
+```css
+.container {
+    position: relative;
+    width: [设计宽度]px;
+    height: [设计高度]px;
+    margin: 0 auto;
+}
+```
+- **图层定位**: 所有图层使用 `position: absolute`
+- **背景处理**: 序号最小的图层通常是背景，应置于最底层
+
+### 4. 响应式处理
+- 在移动端保持设计稿比例
+- 使用 `max-width: 100%` 和 `height: auto` 确保图片响应式
+- 大屏居中显示，两侧留白
+
+### 5. 特殊元素处理
+
+#### 文字图层
+- 文字已转换为图片，直接使用 `<img>` 标签
+- 保留原始文字内容在 `alt` 属性中
+
+#### 隐藏图层
+- 如果图层标记为`隐藏`且有👁️符号，表示在PSD中隐藏但已导出
+- 默认保持隐藏（`display: none`），除非特别说明需要显示
+
+### 6. 代码规范
+
+#### HTML结构
+```html
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>[设计稿名称]</title>
+    <link rel="stylesheet" href="style.css">
+</head>
+<body>
+    <div class="design-container">
+        <!-- 按z-index顺序排列图层 -->
+    </div>
+</body>
+</html>
+```
+
+#### CSS规范
+```css
+* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    min-height: 100vh;
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    background: #f5f5f5;
+}
+
+.design-container {
+    position: relative;
+    width: [设计宽度]px;
+    height: [设计高度]px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.1);
+}
+
+/* 每个图层的样式 */
+.layer-序号 {
+    position: absolute;
+    left: Xpx;
+    top: Ypx;
+    width: Wpx;
+    height: Hpx;
+    z-index: 序号;
+    opacity: 不透明度/100;
+}
+```
+
+## 输出要求
+
+请提供以下三个文件：
+
+请提供以下一个文件：
+
+1. **index.html** - 包含完整的HTML结构、CSS样式和内联JavaScript（将所有代码集成到一个文件中）
+
+## 检查清单（生成后请确认）
+
+- [ ] 容器尺寸是否与设计稿一致？
+- [ ] 所有图片路径是否正确（`images/`目录）？
+- [ ] 每个图层的X/Y坐标是否准确？
+- [ ] 每个图层的宽高是否准确？
+- [ ] 图层顺序是否正确（z-index）？
+- [ ] 透明度是否正确设置？
+- [ ] 隐藏图层是否默认隐藏？
+- [ ] 在移动端预览是否正常？
+
+## 额外说明
+- 不要添加任何额外的设计元素
+- 保持设计稿的原汁原味
+- 如果发现矛盾信息，优先遵循图层详细信息中的坐标
+
+---
+**开始分析以下PSD设计稿数据：**
+
+'''
+
+
+# ai_summary.txt第1~6节的标题与统计数据，用 format_map 一次填充
+_AI_SUMMARY_BODY = '''# PSD文件详细说明
+================================================================================
+
+## 1. 文件基本信息
+- **文件名**: {name}
+- **设计尺寸**: {width} × {height} 像素
+- **宽高比**: {aspect_ratio:.2f}
+- **颜色模式**: {color_mode}
+- **位深度**: {depth}位
+
+## 2. 图层统计分析
+- **总图层数**: {total_layers}
+- **可见图层**: {visible_layers}
+- **文字图层**: {text_layers}
+- **智能对象**: {smart_objects}
+- **调整图层**: {adjustment_layers}
+- **形状图层**: {shape_layers}
+- **图层组**: {layer_groups}
+
+## 3. 导出结果
+- **成功导出**: {exported_layers} 个图层
+- **文字图层导出**: {text_exported}
+- **像素图层导出**: {pixel_exported}
+- **智能对象导出**: {smart_exported}
+- **其他图层导出**: {other_exported}
+- **跳过图层**: {skipped}
+
+## 4. 输出目录结构
+```
+{output_name}/
+├── images/                    # 所有图片素材
+│   ├── 000_layer_name.png    # 命名规则: 序号_图层名.png
+│   ├── 001_another_layer.png
+│   └── ...
+{output_files}```
+
+## 5. 网页布局说明
+### 布局类型分析
+根据图层位置分析，此设计稿使用以下布局方式：
+- **绝对定位**: 所有图层都有精确的X/Y坐标
+- **层次结构**: 图层按导出顺序排列，序号越小层级越低
+- **响应式基准**: 基于 {width}px 宽度设计
+
+### 布局建议
+```html
+<!-- 建议的HTML结构 -->
+<div class="design-container" style="position: relative; width: {width}px; height: {height}px;">
+{layout_example}</div>
+```
+
+## 6. 图层详细信息
+================================================================================
+
+'''
+
+# 第4节目录结构中images/之后的条目：(条目文字, 是否只在生成HTML页面时存在)
+_AI_SUMMARY_TREE_ENTRIES = (
+    ('thumbs/                    # 预览页缩略图（仅大图层生成）', True),
+    ('metadata.json             # 完整结构化数据', False),
+    ('ai_summary.txt            # 本文档 - AI友好说明', False),
+    ('metadata.csv              # 表格格式数据', False),
+    ('web_layout_guide.html     # 网页布局参考', True),
+    ('preview.html              # 素材预览页面', True),
+)
+
+# 第5节布局建议中的背景图层示例
+_AI_SUMMARY_LAYOUT_EXAMPLE = '''    <!-- 背景图层 -->
+    <img src="{relative_path}" 
+         style="position: absolute; left: {x}px; top: {y}px; z-index: 1;">
+
+    <!-- 文字内容 -->
+    <div class="text-content" style="position: absolute; left: Xpx; top: Ypx; z-index: 10;">
+        <!-- 文字已转换为图片 -->
+    </div>
+'''
+
+
+# 预览页模板：静态部分只在模块加载时解析一次
+_PREVIEW_HEADER = string.Template('''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>PSD素材预览</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+        .container { max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 10px; }
+        .header { text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border-radius: 10px; margin-bottom: 20px; }
+        .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin-bottom: 20px; }
+        .stat-card { background: #f8f9fa; padding: 15px; border-radius: 5px; text-align: center; border-left: 4px solid #667eea; }
+        .stat-value { font-size: 1.5em; font-weight: bold; color: #333; }
+        .layers-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(250px, 1fr)); gap: 20px; }
+        .layer-card { border: 1px solid #ddd; border-radius: 5px; padding: 15px; background: white; transition: transform 0.2s; }
+        .layer-card:hover { transform: translateY(-5px); box-shadow: 0 5px 15px rgba(0,0,0,0.1); }
+        .layer-image { width: 100%; height: 150px; object-fit: contain; background: #f0f0f0; border-radius: 3px; margin-bottom: 10px; }
+        .layer-info { margin-top: 10px; }
+        .layer-name { font-weight: bold; margin-bottom: 5px; }
+        .layer-position { font-size: 12px; color: #666; }
+        .type-badge { display: inline-block; padding: 3px 8px; border-radius: 3px; font-size: 11px; margin-right: 5px; }
+        .type-text { background: #d4edda; color: #155724; }
+        .type-pixel { background: #d1ecf1; color: #0c5460; }
+        .type-smart { background: #fff3cd; color: #856404; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🎨 PSD素材预览</h1>
+            <p>${name} - ${width}×${height}px</p>
+        </div>
+
+        <div class="stats">
+            <div class="stat-card">
+                <div class="stat-value">${exported}</div>
+                <div>导出图层</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value">${width}×${height}</div>
+                <div>设计尺寸</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value">${total_layers}</div>
+                <div>总图层数</div>
+            </div>
+        </div>
+
+        <h2>📁 导出素材预览</h2>
+        <div class="layers-grid">
+''')
+
+_PREVIEW_CARD = string.Template('''            <div class="layer-card">
+                <img src="${src}" alt="${name}" class="layer-image" loading="lazy" decoding="async"
+                     onerror="this.src='data:image/svg+xml,<svg xmlns=%22http://www.w3.org/2000/svg%22 viewBox=%220 0 100 100%22><text y=%22.9em%22 font-size=%2290%22>🖼️</text></svg>'">
+                <div class="layer-info">
+                    <div class="layer-name">${name}</div>
+                    <span class="type-badge type-${type}">${type_label}</span>
+                    <div class="layer-position">
+                        位置: (${x}, ${y})<br>
+                        尺寸: ${width}×${height}px
+                    </div>
+                </div>
+            </div>
+''')
+
+_PREVIEW_FOOTER = string.Template('''        </div>
+        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #666;">
+            生成时间: ${generated_at}<br>
+            图片目录: <code>images/</code><br>
+            详细说明: <a href="ai_summary.txt">ai_summary.txt</a>
+        </div>
+    </div>
+</body>
+</html>
+''')
+
+
+# 网页布局指南模板：静态的样式与说明部分只在模块加载时解析一次
+_GUIDE_HEADER = string.Template('''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>网页布局指南 - ${name}</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #333; background: #f8f9fa; padding: 20px; }
+        .container { max-width: 1200px; margin: 0 auto; background: white; padding: 40px; border-radius: 15px; box-shadow: 0 10px 30px rgba(0,0,0,0.1); }
+        .header { text-align: center; margin-bottom: 40px; padding-bottom: 20px; border-bottom: 2px solid #eee; }
+        .header h1 { color: #2c3e50; font-size: 2.5em; margin-bottom: 10px; }
+        .header .subtitle { color: #7f8c8d; font-size: 1.2em; }
+        .design-preview { position: relative; width: ${width}px; height: ${height}px; margin: 0 auto 40px; border: 2px dashed #ddd; background: #f9f9f9; overflow: hidden; }
+        .layer-box { position: absolute; border: 1px solid rgba(102, 126, 234, 0.5); background: rgba(102, 126, 234, 0.1); pointer-events: none; }
+        .layer-label { position: absolute; top: -25px; left: 0; background: #667eea; color: white; padding: 2px 8px; border-radius: 3px; font-size: 12px; white-space: nowrap; }
+        .code-section { background: #2d3a4b; border-radius: 8px; padding: 20px; margin: 20px 0; overflow-x: auto; }
+        .code-section h3 { color: #42b983; margin-bottom: 15px; }
+        pre { color: #abb2bf; font-family: 'Consolas', monospace; font-size: 14px; line-height: 1.5; }
+        .info-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; margin: 30px 0; }
+        .info-card { background: #f8f9fa; padding: 20px; border-radius: 8px; border-left: 4px solid #667eea; }
+        .info-card h3 { color: #2c3e50; margin-bottom: 10px; }
+        .info-card p { color: #666; }
+        .footer { text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #eee; color: #7f8c8d; font-size: 14px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🌐 网页布局实现指南</h1>
+            <div class="subtitle">基于 ${name} 设计稿</div>
+        </div>
+
+        <div class="info-grid">
+            <div class="info-card">
+                <h3>📏 设计规格</h3>
+                <p>• 宽度: ${width}px</p>
+                <p>• 高度: ${height}px</p>
+                <p>• 图层数量: ${exported}个</p>
+                <p>• 布局类型: 绝对定位</p>
+            </div>
+            <div class="info-card">
+                <h3>📁 文件结构</h3>
+                <p>• 图片目录: <code>images/</code></p>
+                <p>• 图片总数: ${exported}个</p>
+                <p>• 命名规则: 序号_图层名.png</p>
+                <p>• 数据文件: <code>metadata.json</code></p>
+            </div>
+            <div class="info-card">
+                <h3>⚙️ 技术实现</h3>
+                <p>• 定位方式: position: absolute</p>
+                <p>• 层级控制: z-index</p>
+                <p>• 尺寸单位: 像素(px)</p>
+                <p>• 响应式: 固定尺寸设计</p>
+            </div>
+        </div>
+
+        <h2>🎨 设计稿布局预览</h2>
+        <div class="design-preview">
+''')
+
+# 布局预览中单个图层的示意框
+_GUIDE_LAYER_BOX = '''            <div class="layer-box" style="left: {x}px; top: {y}px; width: {w}px; height: {h}px; z-index: {i};">
+                <div class="layer-label">#{i} {name}</div>
+            </div>
+'''
+
+# 布局指南中示例代码的开头，后面接各图层的CSS规则
+_GUIDE_CODE_HEADER = string.Template('''        </div>
+
+        <h2>💻 HTML实现代码</h2>
+        <div class="code-section">
+            <h3>基础HTML结构</h3>
+            <pre><code>
+&lt;!-- 基于 ${name} 设计稿的HTML结构 --&gt;
+&lt;!DOCTYPE html&gt;
+&lt;html lang="zh-CN"&gt;
+&lt;head&gt;
+    &lt;meta charset="UTF-8"&gt;
+    &lt;meta name="viewport" content="width=device-width, initial-scale=1.0"&gt;
+    &lt;title&gt;${title} - 网页实现&lt;/title&gt;
+    &lt;style&gt;
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { 
+            font-family: Arial, sans-serif;
+            background: #f5f5f5;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            min-height: 100vh;
+            padding: 20px;
+        }
+
+        .design-container {
+            position: relative;
+            width: ${width}px;
+            height: ${height}px;
+            background: white;
+            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+
+        /* 图层样式 - 根据metadata.json自动生成 */
+''')
+
+# 示例代码中单个图层的CSS规则，参数依次为 序号、名称、序号、x、y、宽、高、序号、不透明度
+_GUIDE_LAYER_CSS = '''        /* 图层 #%d: %s */
+        .layer-%d {
+            position: absolute;
+            left: %dpx;
+            top: %dpx;
+            width: %dpx;
+            height: %dpx;
+            z-index: %d;
+            opacity: %.2f;
+        }
+
+'''
+
+# 示例代码中CSS与HTML之间的固定部分
+_GUIDE_CODE_MIDDLE = '''    &lt;/style&gt;
+&lt;/head&gt;
+&lt;body&gt;
+    &lt;div class="design-container"&gt;
+'''
+
+# 示例代码中单个图层的img标签
+_GUIDE_LAYER_IMG = '''        &lt;!-- {name} --&gt;
+        &lt;img src="{src}" alt="{name}" class="layer-{i}"&gt;
+'''
+
+# 示例代码结尾、实现步骤与页脚
+_GUIDE_FOOTER = string.Template('''    &lt;/div&gt;
+&lt;/body&gt;
+&lt;/html&gt;
+            </code></pre>
+        </div>
+
+        <div class="info-card">
+            <h3>📋 实现步骤</h3>
+            <p>1. 复制<code>images/</code>目录到您的项目</p>
+            <p>2. 根据<code>metadata.json</code>中的位置信息设置CSS</p>
+            <p>3. 使用绝对定位(position: absolute)布局所有元素</p>
+            <p>4. 按z-index顺序排列元素（序号越大层级越高）</p>
+            <p>5. 如需响应式，添加媒体查询调整容器尺寸</p>
+        </div>
+
+        <div class="footer">
+            <p>🛠️ 生成时间: ${generated_at}</p>
+            <p>📄 详细说明: <a href="ai_summary.txt">ai_summary.txt</a> | 完整数据: <a href="metadata.json">metadata.json</a></p>
+        </div>
+    </div>
+
+    <script>
+        // 简单的交互效果
+        document.querySelectorAll('.layer-box').forEach(box => {
+            box.addEventListener('mouseenter', function() {
+                this.style.background = 'rgba(102, 126, 234, 0.3)';
+                this.style.borderColor = '#667eea';
+            });
+            box.addEventListener('mouseleave', function() {
+                this.style.background = 'rgba(102, 126, 234, 0.1)';
+                this.style.borderColor = 'rgba(102, 126, 234, 0.5)';
+            });
+        });
+    </script>
+</body>
+</html>
+''')
 
 
 class PSDWebExtractor:
     """PSD网页素材提取器 - 增强版"""
 
+    # 预览页中各图层类型的显示名称
+    _TYPE_LABELS = {
+        'text': '文字',
+        'pixel': '图片',
+        'smart_object': '智能对象',
+        'other': '其他'
+    }
+
     def __init__(self, psd_path, output_dir,
                  export_invisible=False,
                  expand_smart_objects=False,
-                 font_path=None):
+                 font_path=None,
+                 jobs=None,
+                 png_compress_level=1,
+                 quiet=False,
+                 generate_html=True):
 
         self.psd_path = Path(psd_path)
         self.output_dir = Path(output_dir)
         self.export_invisible = export_invisible
         self.expand_smart_objects = expand_smart_objects
+        self.jobs = jobs or os.cpu_count() or 1
+        self.png_compress_level = png_compress_level
+        self.quiet = quiet
+        self.generate_html = generate_html
+        # 像素摘要 -> 已写出的 (PNG路径, 缩略图路径)，用于重复图层直接复制文件
+        self._files_by_digest = {}
 
         if not self.psd_path.exists():
             raise FileNotFoundError(f"PSD文件不存在: {psd_path}")
 
         # 创建输出目录结构
+        # images/ 在提取图层时才创建，只导出合成图时不留下空目录
         self.images_dir = self.output_dir / "images"
-        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbs_dir = self.output_dir / "thumbs"
+        # 绝对路径只解析一次，逐图层用字符串拼接文件名，不必每次创建Path对象、查询当前目录
+        self._images_abs_prefix = f"{self.images_dir.absolute()}{os.sep}"
+        self._thumbs_prefix = f"{self.thumbs_dir}{os.sep}"
 
         # 初始化处理器
         self.processor = LayerProcessor(font_path)
@@ -169,8 +1081,11 @@ class PSDWebExtractor:
         print(f"📂 加载PSD文件: {self.psd_path.name}")
         self.psd = PSDImage.open(self.psd_path)
 
-        # 收集所有图层
-        self.all_layers = list(self.psd.descendants())
+        # 收集所有图层（descendants()每次调用都会重新遍历图层树，只遍历一次）
+        self.all_layers = tuple(self.psd.descendants())
+        self.layer_meta = [_snapshot_layer(i, layer) for i, layer in enumerate(self.all_layers)]
+        # 每个图层的导出类型只判断一次，统计和导出都直接读取
+        self._layer_types = [self._get_layer_type(meta) for meta in self.layer_meta]
 
         # 收集PSD详细信息
         self.psd_info = self._collect_psd_info()
@@ -183,53 +1098,57 @@ class PSDWebExtractor:
         print(f"   可见图层: {self.psd_info['visible_layers']}")
         print(f"   文字图层: {self.psd_info['text_layers']}")
         print(f"   智能对象: {self.psd_info['smart_objects']}")
+        print(f"   图像引擎: {PILLOW_VARIANT}")
 
     def _collect_psd_info(self):
         """收集PSD文件的详细信息"""
-        info = {
+        # 统计不同类型图层（只读加载时的快照和已判断好的类型，不再访问psd-tools）
+        type_counts = Counter(self._layer_types)
+        kind_counts = Counter(meta.kind for meta in self.layer_meta)
+
+        return {
             'name': self.psd_path.name,
             'width': self.psd.width,
             'height': self.psd.height,
             'color_mode': str(getattr(self.psd, 'color_mode', '未知')),
             'depth': getattr(self.psd, 'depth', '未知'),
             'total_layers': len(self.all_layers),
-            'visible_layers': 0,
-            'text_layers': 0,
-            'smart_objects': 0,
-            'adjustment_layers': 0,
-            'pixel_layers': 0,
-            'shape_layers': 0,
-            'layer_groups': 0
+            'visible_layers': sum(meta.visible for meta in self.layer_meta),
+            'text_layers': type_counts['text'],
+            'smart_objects': type_counts['smart_object'],
+            'adjustment_layers': type_counts['adjustment'],
+            'pixel_layers': sum(meta.has_pixels for meta in self.layer_meta),
+            'shape_layers': kind_counts['shape'],
+            'layer_groups': kind_counts['group']
         }
 
-        # 统计不同类型图层
-        for layer in self.all_layers:
-            if hasattr(layer, 'is_visible') and layer.is_visible():
-                info['visible_layers'] += 1
-
-            # 检查图层类型
-            if hasattr(layer, 'kind'):
-                if layer.kind == 'type':
-                    info['text_layers'] += 1
-                elif layer.kind == 'shape':
-                    info['shape_layers'] += 1
-                elif 'adjustment' in str(layer.kind).lower():
-                    info['adjustment_layers'] += 1
-
-            if hasattr(layer, 'smart_object') and layer.smart_object:
-                info['smart_objects'] += 1
+    def export_composite(self):
+        """导出PSD保存时内嵌的合成图为 composite.png，不解码任何图层
 
-            if hasattr(layer, 'is_group') and layer.is_group:
-                info['layer_groups'] += 1
+        返回文件路径；文件中没有内嵌合成数据时返回None。
+        """
+        if not self.psd.has_preview():
+            return None
 
-            if hasattr(layer, 'has_pixels') and layer.has_pixels():
-                info['pixel_layers'] += 1
+        image = self.psd.topil()
+        if image is None:
+            return None
 
-        return info
+        try:
+            if image.mode not in _PNG_NATIVE_MODES:
+                converted = image.convert('RGBA')
+                image.close()
+                image = converted
+            composite_path = self.output_dir / 'composite.png'
+            _write_file(composite_path, _encode_png(image, self.png_compress_level))
+        finally:
+            image.close()
+        return composite_path
 
     def extract_all_layers(self):
         """提取所有图层"""
         print(f"\n🔧 开始提取图层...")
+        self.images_dir.mkdir(exist_ok=True)
 
         results = []
         layer_stats = {
@@ -242,60 +1161,72 @@ class PSDWebExtractor:
             'skipped': 0
         }
 
-        for i, layer in enumerate(self.all_layers):
+        # 出错的图层和警告先记下，导出结束后统一输出，避免打断进度显示；
+        # 同一条警告（如字体加载失败）在各工作进程中都可能出现，只保留一次
+        errors = []
+        warnings = {}
+
+        # 先在主进程中完成可见性和类型判断，再把耗时的栅格化/编码分发出去
+        pending = []
+        for i, (meta, layer_type) in enumerate(zip(self.layer_meta, self._layer_types)):
             layer_stats['total'] += 1
-            layer_name = getattr(layer, 'name', f"layer_{i}")
 
-            # 检查可见性
-            is_visible = layer.is_visible() if hasattr(layer, 'is_visible') else True
-            if not self.export_invisible and not is_visible:
+            # 检查可见性：不透明度为0的图层同样看不见，跳过时不必解码通道数据
+            if not self.export_invisible and (not meta.visible or meta.opacity == 0):
                 layer_stats['skipped'] += 1
                 continue
 
-            try:
-                layer_type = self._get_layer_type(layer)
-                image = None
-                result = None
+            bbox = meta.bbox
+            # 零面积图层和调整图层没有可导出的像素，不必解码通道数据
+            needs_render = (layer_type != 'adjustment'
+                            and bbox[2] > bbox[0] and bbox[3] > bbox[1])
+            pending.append((i, layer_type, needs_render))
 
-                if layer_type == 'text':
-                    image = self.processor.rasterize_text_layer(layer)
-                    if image:
-                        result = self._create_layer_result(layer, len(results), image, 'text')
-                        layer_stats['text_exported'] += 1
-
-                elif layer_type == 'smart_object':
-                    if not self.expand_smart_objects:
-                        image = self.processor.export_layer_image(layer)
-                        if image:
-                            result = self._create_layer_result(layer, len(results), image, 'smart_object')
-                            layer_stats['smart_exported'] += 1
-
-                elif layer_type == 'pixel':
-                    image = self.processor.export_layer_image(layer)
-                    if image:
-                        result = self._create_layer_result(layer, len(results), image, 'pixel')
-                        layer_stats['pixel_exported'] += 1
+        tasks = [(i, layer_type) for i, layer_type, needs_render in pending if needs_render]
+        renders = self._render_layers(tasks)
 
-                else:
-                    # 尝试导出其他类型图层
-                    image = self.processor.export_layer_image(layer)
-                    if image:
-                        result = self._create_layer_result(layer, len(results), image, 'other')
-                        layer_stats['other_exported'] += 1
+        stat_keys = {
+            'text': 'text_exported',
+            'smart_object': 'smart_exported',
+            'pixel': 'pixel_exported',
+            'other': 'other_exported'
+        }
+
+        progress = LayerProgress(len(pending), quiet=self.quiet)
+        for i, layer_type, needs_render in pending:
+            rendered, error, layer_warnings = next(renders) if needs_render else (None, None, ())
+            warnings.update(dict.fromkeys(layer_warnings))
+            progress.update()
+            if error:
+                layer_stats['skipped'] += 1
+                errors.append(f"  [{i}] ✗ 错误: {self.layer_meta[i].name} - {error}")
+                continue
+
+            try:
+                result = None
+                if rendered:
+                    result_type = layer_type if layer_type in stat_keys else 'other'
+                    result = self._create_layer_result(self.all_layers[i], self.layer_meta[i],
+                                                       len(results), rendered, result_type)
+                    layer_stats[stat_keys[result_type]] += 1
 
                 if result:
                     results.append(result)
                     layer_stats['exported'] += 1
-                    symbol = "✓" if is_visible else "👁️"
-                    print(f"  [{i}] {symbol} {layer_type}: {layer_name}")
                 else:
                     layer_stats['skipped'] += 1
-                    symbol = "-" if is_visible else "👁️-"
-                    print(f"  [{i}] {symbol} 跳过: {layer_name}")
 
             except Exception as e:
                 layer_stats['skipped'] += 1
-                print(f"  [{i}] ✗ 错误: {layer_name} - {e}")
+                errors.append(f"  [{i}] ✗ 错误: {self.layer_meta[i].name} - {e}")
+        progress.close()
+
+        if warnings:
+            print(f"\n⚠️ 警告:")
+            print('\n'.join(f"  {warning}" for warning in warnings))
+        if errors:
+            print(f"\n⚠️ {len(errors)} 个图层导出失败:")
+            print('\n'.join(errors))
 
         print(f"\n📊 提取完成!")
         print(f"   成功导出: {layer_stats['exported']} 个图层")
@@ -307,79 +1238,200 @@ class PSDWebExtractor:
 
         return results, layer_stats
 
-    def _get_layer_type(self, layer):
-        """获取图层类型"""
-        if hasattr(layer, 'kind') and layer.kind == 'type':
+    def _render_layers(self, tasks):
+        """按任务顺序逐个产出 (渲染结果, 错误信息, 警告列表)，多核时使用进程池"""
+        options = {
+            'expand_smart_objects': self.expand_smart_objects,
+            'png_compress_level': self.png_compress_level,
+            'canvas_size': (self.psd.width, self.psd.height),
+            # 缩略图只给preview.html使用，不生成HTML页面时不必编码
+            'generate_html': self.generate_html
+        }
+
+        # 任务不足一个批次时只会启动一个工作进程，它还要重新解析PSD，不如直接在本进程处理
+        if self.jobs <= 1 or len(tasks) <= _POOL_CHUNKSIZE:
+            yield from self._render_serial(tasks, options)
+            return
+
+        done = 0
+        try:
+            for item in self._render_parallel(tasks, options):
+                yield item
+                done += 1
+        except (OSError, BrokenProcessPool) as e:
+            # 沙箱、打包程序等环境中可能无法创建进程池或共享内存，剩余图层改为在本进程处理
+            print(f"⚠️ 并行导出不可用，改为单进程: {e}")
+            yield from self._render_serial(tasks[done:], options)
+
+    def _render_serial(self, tasks, options):
+        """在当前进程中逐个渲染图层"""
+        for i, layer_type in tasks:
+            try:
+                rendered = _render_layer(self.processor, self.all_layers[i], layer_type, options)
+                yield rendered, None, self.processor.pop_warnings()
+            except Exception as e:
+                yield None, str(e), self.processor.pop_warnings()
+
+    def _render_parallel(self, tasks, options):
+        """用进程池渲染图层，按任务顺序产出结果"""
+        # 进程数不超过批次数，避免进程空等
+        batches = -(-len(tasks) // _POOL_CHUNKSIZE)
+        workers = min(self.jobs, batches)
+        if _can_fork():
+            yield from self._render_forked(tasks, options, workers)
+        else:
+            yield from self._render_spawned(tasks, options, workers)
+
+    def _render_forked(self, tasks, options, workers):
+        """fork出的工作进程直接继承主进程已解析的图层，不必重新解析PSD"""
+        _worker_state.update(layers=self.all_layers, processor=self.processor, options=options)
+        # 把已解析的PSD对象移出垃圾回收的追踪范围，子进程定期gc时不会遍历（写入）这些对象，
+        # 继承的内存页才能一直保持写时复制共享
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork')) as executor:
+                # map按提交顺序返回结果，保证导出序号与串行版本一致
+                yield from executor.map(_process_one_layer, tasks, chunksize=_POOL_CHUNKSIZE)
+        finally:
+            gc.unfreeze()
+            _worker_state.clear()
+
+    def _render_spawned(self, tasks, options, workers):
+        """不能fork时每个工作进程自行解析PSD，文件只从磁盘读取一次放进共享内存"""
+        psd_size = self.psd_path.stat().st_size
+        shm = shared_memory.SharedMemory(create=True, size=max(psd_size, 1))
+        try:
+            with open(self.psd_path, 'rb') as f:
+                f.readinto(shm.buf[:psd_size])
+
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_layer_worker,
+                                     initargs=(shm.name, psd_size, self.processor.default_font,
+                                               options)) as executor:
+                # map按提交顺序返回结果，保证导出序号与串行版本一致
+                yield from executor.map(_process_one_layer, tasks, chunksize=_POOL_CHUNKSIZE)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def optimize_pngs(self, png_paths):
+        """导出结束后用oxipng批量无损重压缩给定的PNG文件（需要oxipng在PATH中）"""
+        oxipng = shutil.which('oxipng')
+        if not oxipng:
+            print("⚠️ 未找到oxipng，跳过PNG压缩优化（安装: cargo install oxipng）")
+            return
+
+        png_paths = [str(path) for path in png_paths]
+        size_before = sum(os.path.getsize(path) for path in png_paths)
+        print(f"\n🗜️ 使用oxipng压缩 {len(png_paths)} 个PNG...")
+        # 一次调用处理一批文件，oxipng内部会多线程并行；分批是为了不超出命令行长度限制
+        try:
+            for start in range(0, len(png_paths), _OXIPNG_BATCH):
+                subprocess.run([oxipng, '-o', '2', '--strip', 'safe', '-q',
+                                *png_paths[start:start + _OXIPNG_BATCH]], check=True)
+        # 已导出的PNG本身完好，压缩失败不影响后续文件生成
+        except subprocess.CalledProcessError as e:
+            print(f"   ⚠️ oxipng执行失败，退出码 {e.returncode}")
+            return
+        except OSError as e:
+            print(f"   ⚠️ oxipng执行失败: {e}")
+            return
+        size_after = sum(os.path.getsize(path) for path in png_paths)
+        print(f"   ✅ {size_before / 1024:.1f} KB → {size_after / 1024:.1f} KB")
+
+    def _get_layer_type(self, meta):
+        """根据图层快照判断图层类型"""
+        if meta.kind == 'type':
             return 'text'
-        if hasattr(layer, 'smart_object') and layer.smart_object:
+        if meta.is_smart:
             return 'smart_object'
-        if hasattr(layer, 'kind') and 'adjustment' in str(layer.kind).lower():
+        if 'adjustment' in str(meta.kind).lower():
             return 'adjustment'
-        if hasattr(layer, 'has_pixels') and layer.has_pixels():
-            return 'pixel'
-        return 'other'
-
-    def _create_layer_result(self, layer, index, image, layer_type):
-        """创建图层结果"""
-        bbox = layer.bbox
-        x, y = bbox[0], bbox[1]
-        width = max(bbox[2] - bbox[0], 1)
-        height = max(bbox[3] - bbox[1], 1)
-
-        layer_name = getattr(layer, 'name', f"layer_{index}")
+        return 'pixel' if meta.has_pixels else 'other'
+
+    def _create_layer_result(self, layer, meta, index, rendered, layer_type):
+        """创建图层结果，基础属性取自 meta 快照，rendered 为 _render_layer 的返回值
+
+        位置和尺寸取自实际导出的图片（已裁剪到画布内），layer_bbox 保留PSD中的原始范围。
+        """
+        bbox = meta.bbox
+        png_data, thumb_data, digest, (x, y, width, height) = rendered
+
+        layer_name = meta.name
         clean_name = self._sanitize_filename(layer_name)
 
-        filename = f"{index:03d}_{clean_name}.png"
-        filepath = self.images_dir / filename
+        stem = f"{index:03d}_{clean_name}"
+        filename = f"{stem}.png"
+        filepath = self._images_abs_prefix + filename
         relative_path = f"images/{filename}"
+        # 没有缩略图（图层本身很小）时预览页直接使用原图
+        thumbnail_relative_path = relative_path
 
         try:
-            if image.mode != 'RGBA':
-                image = image.convert('RGBA')
-            image.save(filepath, 'PNG', optimize=True)
+            thumb_name = self._save_layer_files(filepath, f"{stem}.webp", png_data, thumb_data, digest)
+            if thumb_name:
+                thumbnail_relative_path = f"thumbs/{thumb_name}"
         except Exception as e:
             print(f"⚠️ 图片保存失败: {filename} - {e}")
 
-        # 获取图层详细属性
-        opacity = getattr(layer, 'opacity', 100)
-        blend_mode = str(getattr(layer, 'blend_mode', 'normal'))
-        is_visible = layer.is_visible() if hasattr(layer, 'is_visible') else True
-
         # 对于文字图层，收集更多信息
         text_info = {}
         if layer_type == 'text':
             text = getattr(layer, 'text', '')
             text_info = {
                 'text_content': text,
-                'font_size': getattr(layer, 'size', '未知'),
-                'color': str(getattr(layer, 'color', '未知')),
-                'alignment': getattr(layer, 'alignment', '未知')
+                'font_size': _text_font_size(layer) or '未知',
+                'color': _fmt_enum(getattr(layer, 'color', None), '未知'),
+                'alignment': _fmt_enum(getattr(layer, 'alignment', None), '未知')
             }
 
-        return {
-            'index': index,
-            'name': layer_name,
-            'type': layer_type,
-            'text_info': text_info if layer_type == 'text' else {},
-            'filename': filename,
-            'relative_path': relative_path,
-            'absolute_path': str(filepath.absolute()),
-            'position': {'x': x, 'y': y, 'width': width, 'height': height},
-            'visibility': {'visible': is_visible, 'exported': True},
-            'opacity': opacity,
-            'blend_mode': blend_mode,
-            'layer_bbox': {
-                'left': bbox[0], 'top': bbox[1],
-                'right': bbox[2], 'bottom': bbox[3]
-            }
-        }
+        return LayerResult(
+            index=index,
+            name=layer_name,
+            type=layer_type,
+            filename=filename,
+            relative_path=relative_path,
+            thumbnail_relative_path=thumbnail_relative_path,
+            absolute_path=filepath,
+            x=x, y=y, width=width, height=height,
+            visible=meta.visible,
+            opacity=meta.opacity,
+            blend_mode=meta.blend_mode,
+            bbox=bbox,
+            text_info=text_info
+        )
+
+    def _save_layer_files(self, filepath, thumb_name, png_data, thumb_data, digest):
+        """写入图层PNG和缩略图，返回缩略图文件名（没有缩略图时为None）
+
+        像素与之前的图层完全相同时直接复制已写出的文件。
+        """
+        thumb_path = self._thumbs_prefix + thumb_name
+        source = self._files_by_digest.get(digest)
+        if source is not None:
+            source_png, source_thumb = source
+            shutil.copyfile(source_png, filepath)
+            if source_thumb is None:
+                return None
+            shutil.copyfile(source_thumb, thumb_path)
+            return thumb_name
+        if png_data is None:
+            raise FileNotFoundError("重复图层的源文件未能写出")
+
+        _write_file(filepath, png_data)
+        if thumb_data is None:
+            thumb_path = thumb_name = None
+        else:
+            self.thumbs_dir.mkdir(exist_ok=True)
+            _write_file(thumb_path, thumb_data)
+        self._files_by_digest[digest] = (filepath, thumb_path)
+        return thumb_name
 
     def _sanitize_filename(self, name):
         """清理文件名"""
-        import re
-        clean = re.sub(r'[<>:"/\\|?*]', '_', name)
-        clean = clean.strip().strip('.')
-        return clean[:50] if len(clean) > 50 else clean
+        clean = name.translate(_ILLEGAL_FILENAME_TABLE).strip().strip('.')
+        return clean[:50]
 
     def generate_metadata(self, results, layer_stats):
         """生成元数据文件 - 增强版，添加AI友好说明"""
@@ -389,6 +1441,10 @@ class PSDWebExtractor:
 
         print(f"\n📝 生成元数据文件...")
 
+        # 生成时间只取一次，JSON与两个HTML页面中的时间保持一致
+        now = datetime.now()
+        generated_at = now.strftime('%Y-%m-%d %H:%M:%S')
+
         # 1. 生成详细的JSON元数据
         json_data = {
             'psd_documentation': {
@@ -423,7 +1479,7 @@ class PSDWebExtractor:
                 'export_config': {
                     'export_invisible': self.export_invisible,
                     'expand_smart_objects': self.expand_smart_objects,
-                    'export_time': datetime.now().isoformat()
+                    'export_time': now.isoformat()
                 },
                 'output_structure': {
                     'root_directory': str(self.output_dir.absolute()),
@@ -432,12 +1488,11 @@ class PSDWebExtractor:
                     'file_naming_convention': '###_layer_name.png'
                 }
             },
-            'layers': results
+            'layers': [result.to_dict() for result in results]
         }
 
         json_path = self.output_dir / 'metadata.json'
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
+        json_path.write_bytes(_dump_json_bytes(json_data))
 
         print(f"   ✅ JSON元数据: {json_path}")
 
@@ -447,11 +1502,12 @@ class PSDWebExtractor:
         # 3. 生成CSV文件
         self._generate_csv_metadata(results)
 
-        # 4. 生成HTML预览
-        self._generate_html_preview(results)
+        if self.generate_html:
+            # 4. 生成HTML预览
+            self._generate_html_preview(results, generated_at)
 
-        # 5. 生成网页布局指南
-        self._generate_web_layout_guide(results)
+            # 5. 生成网页布局指南
+            self._generate_web_layout_guide(results, generated_at)
 
         print("✅ 所有元数据文件生成完成")
 
@@ -459,246 +1515,84 @@ class PSDWebExtractor:
         """生成AI友好的详细文本说明"""
         summary_path = self.output_dir / 'ai_summary.txt'
 
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            #AI提示词
-
-            # 在 _generate_ai_friendly_summary 方法的开头添加
-
-            f.write("# 🎯 AI网页生成任务说明\n\n")
-            f.write("## 任务目标\n")
-            f.write("请根据以下PSD设计稿的详细说明，生成一个**与原始设计图完全一致**的HTML网页。\n\n")
-            f.write("## 核心要求\n\n")
-            f.write("### 1. 精确还原\n")
-            f.write("- **尺寸精确**: 严格按照说明中的`设计尺寸`设置容器宽度和高度\n")
-            f.write("- **位置精确**: 每个图层必须按照说明中的`位置坐标`进行绝对定位\n")
-            f.write("- **大小精确**: 每个图层的`宽度`和`高度`必须与说明完全一致\n")
-            f.write("- **层级精确**: 严格按照`层级(Z-index)`顺序排列，数值越大越靠上\n\n")
-            f.write("### 2. 图片资源\n")
-            f.write("- **图片路径**: 所有图片都存放在`images/`目录下\n")
-            f.write("- **引用方式**: 使用相对路径，例如 `<img src=\"images/001_logo.png\">`\n")
-            f.write("- **图片格式**: 所有图片都是PNG格式，已保留透明通道\n\n")
-            f.write("### 3. 布局方式\n")
-            f.write("- **容器设置**:\n")
-            f.write("```css\n")
-            f.write(".container {\n")
-            f.write("    position: relative;\n")
-            f.write("    width: [设计宽度]px;\n")
-            f.write("    height: [设计高度]px;\n")
-            f.write("    margin: 0 auto;\n")
-            f.write("}\n")
-            f.write("```\n")
-            f.write("- **图层定位**: 所有图层使用 `position: absolute`\n")
-            f.write("- **背景处理**: 序号最小的图层通常是背景，应置于最底层\n\n")
-            f.write("### 4. 响应式处理\n")
-            f.write("- 在移动端保持设计稿比例\n")
-            f.write("- 使用 `max-width: 100%` 和 `height: auto` 确保图片响应式\n")
-            f.write("- 大屏居中显示，两侧留白\n\n")
-            f.write("### 5. 特殊元素处理\n\n")
-            f.write("#### 文字图层\n")
-            f.write("- 文字已转换为图片，直接使用 `<img>` 标签\n")
-            f.write("- 保留原始文字内容在 `alt` 属性中\n\n")
-            f.write("#### 隐藏图层\n")
-            f.write("- 如果图层标记为`隐藏`且有👁️符号，表示在PSD中隐藏但已导出\n")
-            f.write("- 默认保持隐藏（`display: none`），除非特别说明需要显示\n\n")
-            f.write("### 6. 代码规范\n\n")
-            f.write("#### HTML结构\n")
-            f.write("```html\n")
-            f.write("<!DOCTYPE html>\n")
-            f.write("<html lang=\"zh-CN\">\n")
-            f.write("<head>\n")
-            f.write("    <meta charset=\"UTF-8\">\n")
-            f.write("    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n")
-            f.write("    <title>[设计稿名称]</title>\n")
-            f.write("    <link rel=\"stylesheet\" href=\"style.css\">\n")
-            f.write("</head>\n")
-            f.write("<body>\n")
-            f.write("    <div class=\"design-container\">\n")
-            f.write("        <!-- 按z-index顺序排列图层 -->\n")
-            f.write("    </div>\n")
-            f.write("</body>\n")
-            f.write("</html>\n")
-            f.write("```\n\n")
-            f.write("#### CSS规范\n")
-            f.write("```css\n")
-            f.write("* {\n")
-            f.write("    margin: 0;\n")
-            f.write("    padding: 0;\n")
-            f.write("    box-sizing: border-box;\n")
-            f.write("}\n\n")
-            f.write("body {\n")
-            f.write("    min-height: 100vh;\n")
-            f.write("    display: flex;\n")
-            f.write("    justify-content: center;\n")
-            f.write("    align-items: center;\n")
-            f.write("    background: #f5f5f5;\n")
-            f.write("}\n\n")
-            f.write(".design-container {\n")
-            f.write("    position: relative;\n")
-            f.write("    width: [设计宽度]px;\n")
-            f.write("    height: [设计高度]px;\n")
-            f.write("    box-shadow: 0 10px 30px rgba(0,0,0,0.1);\n")
-            f.write("}\n\n")
-            f.write("/* 每个图层的样式 */\n")
-            f.write(".layer-序号 {\n")
-            f.write("    position: absolute;\n")
-            f.write("    left: Xpx;\n")
-            f.write("    top: Ypx;\n")
-            f.write("    width: Wpx;\n")
-            f.write("    height: Hpx;\n")
-            f.write("    z-index: 序号;\n")
-            f.write("    opacity: 不透明度/100;\n")
-            f.write("}\n")
-            f.write("```\n\n")
-            f.write("## 输出要求\n\n")
-            f.write("请提供以下三个文件：\n\n")
-            f.write("请提供以下一个文件：\n\n")
-            f.write("1. **index.html** - 包含完整的HTML结构、CSS样式和内联JavaScript（将所有代码集成到一个文件中）\n\n")
-            f.write("## 检查清单（生成后请确认）\n\n")
-            f.write("- [ ] 容器尺寸是否与设计稿一致？\n")
-            f.write("- [ ] 所有图片路径是否正确（`images/`目录）？\n")
-            f.write("- [ ] 每个图层的X/Y坐标是否准确？\n")
-            f.write("- [ ] 每个图层的宽高是否准确？\n")
-            f.write("- [ ] 图层顺序是否正确（z-index）？\n")
-            f.write("- [ ] 透明度是否正确设置？\n")
-            f.write("- [ ] 隐藏图层是否默认隐藏？\n")
-            f.write("- [ ] 在移动端预览是否正常？\n\n")
-            f.write("## 额外说明\n")
-            f.write("- 不要添加任何额外的设计元素\n")
-            f.write("- 保持设计稿的原汁原味\n")
-            f.write("- 如果发现矛盾信息，优先遵循图层详细信息中的坐标\n\n")
-            f.write("---\n")
-            f.write("**开始分析以下PSD设计稿数据：**\n\n")
-
-            # 第一部分：PSD文件详细说明
-            f.write("# PSD文件详细说明\n")
-            f.write("=" * 80 + "\n\n")
-
-            f.write("## 1. 文件基本信息\n")
-            f.write(f"- **文件名**: {self.psd_info['name']}\n")
-            f.write(f"- **设计尺寸**: {self.psd_info['width']} × {self.psd_info['height']} 像素\n")
-            f.write(f"- **宽高比**: {self.psd_info['width'] / self.psd_info['height']:.2f}\n")
-            f.write(f"- **颜色模式**: {self.psd_info['color_mode']}\n")
-            f.write(f"- **位深度**: {self.psd_info['depth']}位\n\n")
-
-            # 第二部分：图层统计
-            f.write("## 2. 图层统计分析\n")
-            f.write(f"- **总图层数**: {self.psd_info['total_layers']}\n")
-            f.write(f"- **可见图层**: {self.psd_info['visible_layers']}\n")
-            f.write(f"- **文字图层**: {self.psd_info['text_layers']}\n")
-            f.write(f"- **智能对象**: {self.psd_info['smart_objects']}\n")
-            f.write(f"- **调整图层**: {self.psd_info['adjustment_layers']}\n")
-            f.write(f"- **形状图层**: {self.psd_info['shape_layers']}\n")
-            f.write(f"- **图层组**: {self.psd_info['layer_groups']}\n\n")
-
-            # 第三部分：导出统计
-            f.write("## 3. 导出结果\n")
-            f.write(f"- **成功导出**: {len(results)} 个图层\n")
-            f.write(f"- **文字图层导出**: {layer_stats['text_exported']}\n")
-            f.write(f"- **像素图层导出**: {layer_stats['pixel_exported']}\n")
-            f.write(f"- **智能对象导出**: {layer_stats['smart_exported']}\n")
-            f.write(f"- **其他图层导出**: {layer_stats['other_exported']}\n")
-            f.write(f"- **跳过图层**: {layer_stats['skipped']}\n\n")
-
-            # 第四部分：目录结构说明
-            f.write("## 4. 输出目录结构\n")
-            f.write("```\n")
-            f.write(f"{self.output_dir.name}/\n")
-            f.write("├── images/                    # 所有图片素材\n")
-            f.write("│   ├── 000_layer_name.png    # 命名规则: 序号_图层名.png\n")
-            f.write("│   ├── 001_another_layer.png\n")
-            f.write("│   └── ...\n")
-            f.write("├── metadata.json             # 完整结构化数据\n")
-            f.write("├── ai_summary.txt            # 本文档 - AI友好说明\n")
-            f.write("├── metadata.csv              # 表格格式数据\n")
-            f.write("├── web_layout_guide.html     # 网页布局参考\n")
-            f.write("└── preview.html              # 素材预览页面\n")
-            f.write("```\n\n")
-
-            # 第五部分：网页布局说明
-            f.write("## 5. 网页布局说明\n")
-            f.write("### 布局类型分析\n")
-            f.write("根据图层位置分析，此设计稿使用以下布局方式：\n")
-            f.write("- **绝对定位**: 所有图层都有精确的X/Y坐标\n")
-            f.write("- **层次结构**: 图层按导出顺序排列，序号越小层级越低\n")
-            f.write("- **响应式基准**: 基于 {self.psd_info['width']}px 宽度设计\n\n")
-
-            f.write("### 布局建议\n")
-            f.write("```html\n")
-            f.write("<!-- 建议的HTML结构 -->\n")
-            f.write(
-                "<div class=\"design-container\" style=\"position: relative; width: {self.psd_info['width']}px; height: {self.psd_info['height']}px;\">\n")
-
-            # 添加图层示例
-            if results:
-                f.write("    <!-- 背景图层 -->\n")
-                f.write(f"    <img src=\"{results[0]['relative_path']}\" \n")
-                f.write(
-                    f"         style=\"position: absolute; left: {results[0]['position']['x']}px; top: {results[0]['position']['y']}px; z-index: 1;\">\n")
-                f.write("\n")
-                f.write("    <!-- 文字内容 -->\n")
-                f.write(
-                    "    <div class=\"text-content\" style=\"position: absolute; left: Xpx; top: Ypx; z-index: 10;\">\n")
-                f.write("        <!-- 文字已转换为图片 -->\n")
-                f.write("    </div>\n")
-            f.write("</div>\n")
-            f.write("```\n\n")
-
-            # 第六部分：图层详细信息
-            f.write("## 6. 图层详细信息\n")
-            f.write("=" * 80 + "\n\n")
-
-            for result in results:
-                pos = result['position']
-                visible_symbol = "👁️ " if not result['visibility']['visible'] else ""
-
-                f.write(f"### 图层 #{result['index']}: {visible_symbol}{result['name']}\n")
-                f.write(f"- **类型**: {result['type']}\n")
-
-                # 如果是文字图层，显示文字内容
-                if result['type'] == 'text' and result.get('text_info', {}).get('text_content'):
-                    f.write(f"- **文字内容**: \"{result['text_info']['text_content']}\"\n")
-                    if result['text_info'].get('font_size'):
-                        f.write(f"- **字体大小**: {result['text_info']['font_size']}\n")
-                    if result['text_info'].get('color'):
-                        f.write(f"- **文字颜色**: {result['text_info']['color']}\n")
-
-                # ✅ 修改这里：使用相对路径而不是绝对路径
-                f.write(f"- **图片文件**: `{result['relative_path']}`\n")
-                f.write(f"- **位置坐标**: ({pos['x']}px, {pos['y']}px)\n")
-                f.write(f"- **尺寸大小**: {pos['width']}px × {pos['height']}px\n")
-                f.write(f"- **不透明度**: {result['opacity']}%\n")
-                f.write(f"- **可见性**: {'可见' if result['visibility']['visible'] else '隐藏'}\n")
-                f.write(f"- **混合模式**: {result['blend_mode']}\n")
-                f.write(f"- **层级(Z-index)**: {result['index']} (数值越大层级越高)\n")
-
-                # CSS代码示例
-                f.write(f"\n**CSS定位代码**:\n")
-                f.write("```css\n")
-                f.write(f".layer-{result['index']} {{\n")
-                f.write(f"    position: absolute;\n")
-                f.write(f"    left: {pos['x']}px;\n")
-                f.write(f"    top: {pos['y']}px;\n")
-                f.write(f"    width: {pos['width']}px;\n")
-                f.write(f"    height: {pos['height']}px;\n")
-                f.write(f"    z-index: {result['index']};\n")
-                f.write(f"    opacity: {result['opacity'] / 100:.2f};\n")
-                f.write("}\n")
-                f.write("```\n\n")
-
-                # HTML使用示例
-                f.write("**HTML使用示例**:\n")
-                f.write("```html\n")
-                if result['type'] == 'text':
-                    f.write(f"<!-- 文字已转换为图片 -->\n")
-                # ✅ 修改这里：使用相对路径而不是绝对路径
-                f.write(f"<img src=\"{result['relative_path']}\" \n")
-                f.write(f"     alt=\"{result['name']}\" \n")
-                f.write(f"     class=\"layer-{result['index']}\">\n")
-                f.write("```\n\n")
-                f.write("---\n\n")
+        psd_info = self.psd_info
+        background = results[0]
+        layout_example = _AI_SUMMARY_LAYOUT_EXAMPLE.format(
+            relative_path=background.relative_path, x=background.x, y=background.y)
+        # 不生成HTML页面时也不会有缩略图，目录结构中去掉这些条目
+        entries = [entry for entry, html_only in _AI_SUMMARY_TREE_ENTRIES
+                   if self.generate_html or not html_only]
+        output_files = ''.join(f"├── {entry}\n" for entry in entries[:-1]) + f"└── {entries[-1]}\n"
+
+        # 固定的AI任务说明在前，本次导出的文件信息与统计数据一次填入模板
+        lines = [_AI_SUMMARY_HEADER, _AI_SUMMARY_BODY.format_map({
+            **psd_info,
+            **layer_stats,
+            'aspect_ratio': psd_info['width'] / psd_info['height'],
+            'exported_layers': len(results),
+            'output_name': self.output_dir.name,
+            'output_files': output_files,
+            'layout_example': layout_example
+        })]
+
+        # 每个图层的说明段落一次格式化完成
+        lines.extend(self._format_layer_summary(result) for result in results)
+
+        # 所有内容先收集到列表中，最后一次性写入
+        summary_path.write_text(''.join(lines), encoding='utf-8')
 
         print(f"   ✅ AI友好说明: {summary_path}")
 
+    def _format_layer_summary(self, result):
+        """生成单个图层的详细说明段落（基本信息、CSS定位代码、HTML使用示例）"""
+        index = result.index
+        visible = result.visible
+        text_info = result.text_info
+
+        # 如果是文字图层，显示文字内容
+        text_lines = ''
+        if result.type == 'text' and text_info.get('text_content'):
+            text_lines = f"- **文字内容**: \"{text_info['text_content']}\"\n"
+            if text_info.get('font_size'):
+                text_lines += f"- **字体大小**: {text_info['font_size']}\n"
+            if text_info.get('color'):
+                text_lines += f"- **文字颜色**: {text_info['color']}\n"
+        text_comment = "<!-- 文字已转换为图片 -->\n" if result.type == 'text' else ""
+
+        # 图片一律使用相对路径而不是绝对路径
+        return (
+            f"### 图层 #{index}: {'' if visible else '👁️ '}{result.name}\n"
+            f"- **类型**: {result.type}\n"
+            f"{text_lines}"
+            f"- **图片文件**: `{result.relative_path}`\n"
+            f"- **位置坐标**: ({result.x}px, {result.y}px)\n"
+            f"- **尺寸大小**: {result.width}px × {result.height}px\n"
+            f"- **不透明度**: {result.opacity}%\n"
+            f"- **可见性**: {'可见' if visible else '隐藏'}\n"
+            f"- **混合模式**: {result.blend_mode}\n"
+            f"- **层级(Z-index)**: {index} (数值越大层级越高)\n"
+            "\n**CSS定位代码**:\n"
+            "```css\n"
+            f".layer-{index} {{\n"
+            "    position: absolute;\n"
+            f"    left: {result.x}px;\n"
+            f"    top: {result.y}px;\n"
+            f"    width: {result.width}px;\n"
+            f"    height: {result.height}px;\n"
+            f"    z-index: {index};\n"
+            f"    opacity: {result.opacity / 100:.2f};\n"
+            "}\n"
+            "```\n\n"
+            "**HTML使用示例**:\n"
+            "```html\n"
+            f"{text_comment}"
+            f"<img src=\"{result.relative_path}\" \n"
+            f"     alt=\"{result.name}\" \n"
+            f"     class=\"layer-{index}\">\n"
+            "```\n\n"
+            "---\n\n"
+        )
+
     def _generate_csv_metadata(self, results):
         """生成CSV元数据"""
         try:
@@ -706,335 +1600,118 @@ class PSDWebExtractor:
 
             csv_path = self.output_dir / 'metadata.csv'
 
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            with open(csv_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
                 writer = csv.writer(f)
 
                 writer.writerow(['序号', '图层名称', '类型', '文字内容', '图片文件',
                                  '相对路径', 'X位置', 'Y位置', '宽度', '高度',
                                  '不透明度', '可见性', '混合模式', '层级'])
 
-                for result in results:
-                    pos = result['position']
-                    text_content = result.get('text_info', {}).get('text_content', '')
-
-                    writer.writerow([
-                        result['index'],
-                        result['name'],
-                        result['type'],
-                        text_content,
-                        result['filename'],
-                        result['relative_path'],
-                        pos['x'],
-                        pos['y'],
-                        pos['width'],
-                        pos['height'],
-                        result['opacity'],
-                        '可见' if result['visibility']['visible'] else '隐藏',
-                        result['blend_mode'],
-                        result['index']
-                    ])
+                # writerows在C层循环写入，避免逐行调用writerow
+                writer.writerows(_row_iter(results))
 
             print(f"   ✅ CSV元数据: {csv_path}")
 
         except ImportError:
             print("   ⚠️ CSV模块不可用，跳过CSV生成")
 
-    def _generate_html_preview(self, results):
+    def _generate_html_preview(self, results, generated_at):
         """生成HTML预览"""
         try:
             html_path = self.output_dir / 'preview.html'
 
-            html_content = '''
-            <!DOCTYPE html>
-            <html lang="zh-CN">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>PSD素材预览</title>
-                <style>
-                    body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
-                    .container { max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 10px; }
-                    .header { text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border-radius: 10px; margin-bottom: 20px; }
-                    .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin-bottom: 20px; }
-                    .stat-card { background: #f8f9fa; padding: 15px; border-radius: 5px; text-align: center; border-left: 4px solid #667eea; }
-                    .stat-value { font-size: 1.5em; font-weight: bold; color: #333; }
-                    .layers-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(250px, 1fr)); gap: 20px; }
-                    .layer-card { border: 1px solid #ddd; border-radius: 5px; padding: 15px; background: white; transition: transform 0.2s; }
-                    .layer-card:hover { transform: translateY(-5px); box-shadow: 0 5px 15px rgba(0,0,0,0.1); }
-                    .layer-image { width: 100%; height: 150px; object-fit: contain; background: #f0f0f0; border-radius: 3px; margin-bottom: 10px; }
-                    .layer-info { margin-top: 10px; }
-                    .layer-name { font-weight: bold; margin-bottom: 5px; }
-                    .layer-position { font-size: 12px; color: #666; }
-                    .type-badge { display: inline-block; padding: 3px 8px; border-radius: 3px; font-size: 11px; margin-right: 5px; }
-                    .type-text { background: #d4edda; color: #155724; }
-                    .type-pixel { background: #d1ecf1; color: #0c5460; }
-                    .type-smart { background: #fff3cd; color: #856404; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🎨 PSD素材预览</h1>
-                        <p>''' + f'{self.psd_info["name"]} - {self.psd_info["width"]}×{self.psd_info["height"]}px' + '''</p>
-                    </div>
-
-                    <div class="stats">
-                        <div class="stat-card">
-                            <div class="stat-value">''' + f'{len(results)}' + '''</div>
-                            <div>导出图层</div>
-                        </div>
-                        <div class="stat-card">
-                            <div class="stat-value">''' + f'{self.psd_info["width"]}×{self.psd_info["height"]}' + '''</div>
-                            <div>设计尺寸</div>
-                        </div>
-                        <div class="stat-card">
-                            <div class="stat-value">''' + f'{self.psd_info["total_layers"]}' + '''</div>
-                            <div>总图层数</div>
-                        </div>
-                    </div>
-
-                    <h2>📁 导出素材预览</h2>
-                    <div class="layers-grid">
-            '''
-
-            for result in results:
-                type_class = f"type-{result['type']}"
-                type_label = {
-                    'text': '文字',
-                    'pixel': '图片',
-                    'smart_object': '智能对象',
-                    'other': '其他'
-                }.get(result['type'], result['type'])
-
-                html_content += f'''
-                        <div class="layer-card">
-                            <img src="{result['relative_path']}" alt="{result['name']}" class="layer-image"
-                                 onerror="this.src='data:image/svg+xml,<svg xmlns=%22http://www.w3.org/2000/svg%22 viewBox=%220 0 100 100%22><text y=%22.9em%22 font-size=%2290%22>🖼️</text></svg>'">
-                            <div class="layer-info">
-                                <div class="layer-name">{result['name']}</div>
-                                <span class="type-badge type-{result['type']}">{type_label}</span>
-                                <div class="layer-position">
-                                    位置: ({result['position']['x']}, {result['position']['y']})<br>
-                                    尺寸: {result['position']['width']}×{result['position']['height']}px
-                                </div>
-                            </div>
-                        </div>
-                '''
-
-            html_content += '''
-                    </div>
-                    <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #666;">
-                        生成时间: ''' + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + '''<br>
-                        图片目录: <code>images/</code><br>
-                        详细说明: <a href="ai_summary.txt">ai_summary.txt</a>
-                    </div>
-                </div>
-            </body>
-            </html>
-            '''
-
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            psd_info = self.psd_info
+            type_labels = self._TYPE_LABELS
+
+            # 图层名和文件名来自PSD，写入HTML前统一转义
+            cards = [_PREVIEW_CARD.substitute(
+                src=html.escape(result.thumbnail_relative_path),
+                name=html.escape(result.name),
+                type=result.type,
+                type_label=type_labels.get(result.type, result.type),
+                x=result.x,
+                y=result.y,
+                width=result.width,
+                height=result.height
+            ) for result in results]
+
+            html_content = ''.join([
+                _PREVIEW_HEADER.substitute(
+                    name=html.escape(psd_info['name']),
+                    width=psd_info['width'],
+                    height=psd_info['height'],
+                    exported=len(results),
+                    total_layers=psd_info['total_layers']
+                ),
+                *cards,
+                _PREVIEW_FOOTER.substitute(generated_at=generated_at)
+            ])
+            # 一次编码为UTF-8字节再写入，不经过文本模式的逐块编码
+            html_path.write_bytes(html_content.encode('utf-8'))
 
             print(f"   ✅ HTML预览: {html_path}")
 
         except Exception as e:
             print(f"   ⚠️ HTML生成失败: {e}")
 
-    def _generate_web_layout_guide(self, results):
+    def _generate_web_layout_guide(self, results, generated_at):
         """生成网页布局指南"""
         try:
             guide_path = self.output_dir / 'web_layout_guide.html'
 
-            guide_content = f'''
-            <!DOCTYPE html>
-            <html lang="zh-CN">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>网页布局指南 - {self.psd_info['name']}</title>
-                <style>
-                    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-                    body {{ font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #333; background: #f8f9fa; padding: 20px; }}
-                    .container {{ max-width: 1200px; margin: 0 auto; background: white; padding: 40px; border-radius: 15px; box-shadow: 0 10px 30px rgba(0,0,0,0.1); }}
-                    .header {{ text-align: center; margin-bottom: 40px; padding-bottom: 20px; border-bottom: 2px solid #eee; }}
-                    .header h1 {{ color: #2c3e50; font-size: 2.5em; margin-bottom: 10px; }}
-                    .header .subtitle {{ color: #7f8c8d; font-size: 1.2em; }}
-                    .design-preview {{ position: relative; width: {self.psd_info['width']}px; height: {self.psd_info['height']}px; margin: 0 auto 40px; border: 2px dashed #ddd; background: #f9f9f9; overflow: hidden; }}
-                    .layer-box {{ position: absolute; border: 1px solid rgba(102, 126, 234, 0.5); background: rgba(102, 126, 234, 0.1); pointer-events: none; }}
-                    .layer-label {{ position: absolute; top: -25px; left: 0; background: #667eea; color: white; padding: 2px 8px; border-radius: 3px; font-size: 12px; white-space: nowrap; }}
-                    .code-section {{ background: #2d3a4b; border-radius: 8px; padding: 20px; margin: 20px 0; overflow-x: auto; }}
-                    .code-section h3 {{ color: #42b983; margin-bottom: 15px; }}
-                    pre {{ color: #abb2bf; font-family: 'Consolas', monospace; font-size: 14px; line-height: 1.5; }}
-                    .info-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; margin: 30px 0; }}
-                    .info-card {{ background: #f8f9fa; padding: 20px; border-radius: 8px; border-left: 4px solid #667eea; }}
-                    .info-card h3 {{ color: #2c3e50; margin-bottom: 10px; }}
-                    .info-card p {{ color: #666; }}
-                    .footer {{ text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #eee; color: #7f8c8d; font-size: 14px; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🌐 网页布局实现指南</h1>
-                        <div class="subtitle">基于 {self.psd_info['name']} 设计稿</div>
-                    </div>
-
-                    <div class="info-grid">
-                        <div class="info-card">
-                            <h3>📏 设计规格</h3>
-                            <p>• 宽度: {self.psd_info['width']}px</p>
-                            <p>• 高度: {self.psd_info['height']}px</p>
-                            <p>• 图层数量: {len(results)}个</p>
-                            <p>• 布局类型: 绝对定位</p>
-                        </div>
-                        <div class="info-card">
-                            <h3>📁 文件结构</h3>
-                            <p>• 图片目录: <code>images/</code></p>
-                            <p>• 图片总数: {len(results)}个</p>
-                            <p>• 命名规则: 序号_图层名.png</p>
-                            <p>• 数据文件: <code>metadata.json</code></p>
-                        </div>
-                        <div class="info-card">
-                            <h3>⚙️ 技术实现</h3>
-                            <p>• 定位方式: position: absolute</p>
-                            <p>• 层级控制: z-index</p>
-                            <p>• 尺寸单位: 像素(px)</p>
-                            <p>• 响应式: 固定尺寸设计</p>
-                        </div>
-                    </div>
-
-                    <h2>🎨 设计稿布局预览</h2>
-                    <div class="design-preview">
-            '''
+            psd_info = self.psd_info
+            # 图层名和文件名来自PSD，写入HTML前统一转义
+            doc_name = html.escape(psd_info['name'])
+            # 布局预览最多显示10个图层，示例代码取前5个图层，各切片一次
+            preview_slice = results[:10]
+            sample = results[:5]
+
+            # 各段内容先收集到列表中，最后一次拼接，避免 += 反复复制整个字符串
+            parts = [_GUIDE_HEADER.substitute(
+                name=doc_name,
+                width=psd_info['width'],
+                height=psd_info['height'],
+                exported=len(results)
+            )]
 
             # 添加图层预览框
-            for result in results[:10]:  # 最多显示10个图层预览
-                pos = result['position']
-                if pos['width'] > 10 and pos['height'] > 10:  # 只显示足够大的图层
-                    guide_content += f'''
-                        <div class="layer-box" style="
-                            left: {pos['x']}px;
-                            top: {pos['y']}px;
-                            width: {pos['width']}px;
-                            height: {pos['height']}px;
-                            z-index: {result['index']};
-                        ">
-                            <div class="layer-label">#{result['index']} {result['name'][:15]}{'...' if len(result['name']) > 15 else ''}</div>
-                        </div>
-                    '''
-
-            guide_content += f'''
-                    </div>
-
-                    <h2>💻 HTML实现代码</h2>
-                    <div class="code-section">
-                        <h3>基础HTML结构</h3>
-                        <pre><code>
-&lt;!-- 基于 {self.psd_info['name']} 设计稿的HTML结构 --&gt;
-&lt;!DOCTYPE html&gt;
-&lt;html lang="zh-CN"&gt;
-&lt;head&gt;
-    &lt;meta charset="UTF-8"&gt;
-    &lt;meta name="viewport" content="width=device-width, initial-scale=1.0"&gt;
-    &lt;title&gt;{self.psd_info['name'].replace('.psd', '')} - 网页实现&lt;/title&gt;
-    &lt;style&gt;
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ 
-            font-family: Arial, sans-serif;
-            background: #f5f5f5;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            min-height: 100vh;
-            padding: 20px;
-        }}
-
-        .design-container {{
-            position: relative;
-            width: {self.psd_info['width']}px;
-            height: {self.psd_info['height']}px;
-            background: white;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-
-        /* 图层样式 - 根据metadata.json自动生成 */
-                        '''
+            for result in preview_slice:
+                if result.width > 10 and result.height > 10:  # 只显示足够大的图层
+                    name = result.name
+                    # 标签文字先截断再转义，避免把实体字符截成两半
+                    parts.append(_GUIDE_LAYER_BOX.format_map({
+                        'x': result.x, 'y': result.y,
+                        'w': result.width, 'h': result.height,
+                        'i': result.index,
+                        'name': html.escape(name[:15]) + ('...' if len(name) > 15 else '')
+                    }))
+
+            parts.append(_GUIDE_CODE_HEADER.substitute(
+                name=doc_name,
+                title=doc_name.replace('.psd', ''),
+                width=psd_info['width'],
+                height=psd_info['height']
+            ))
 
             # 添加图层CSS
-            for result in results[:5]:  # 示例前5个图层
-                pos = result['position']
-                guide_content += f'''
-        /* 图层 #{result['index']}: {result['name']} */
-        .layer-{result['index']} {{
-            position: absolute;
-            left: {pos['x']}px;
-            top: {pos['y']}px;
-            width: {pos['width']}px;
-            height: {pos['height']}px;
-            z-index: {result['index']};
-            opacity: {result['opacity'] / 100:.2f};
-        }}
-                '''
-
-            guide_content += '''
-    &lt;/style&gt;
-&lt;/head&gt;
-&lt;body&gt;
-    &lt;div class="design-container"&gt;
-        '''
+            parts.extend(_GUIDE_LAYER_CSS % (
+                result.index, html.escape(result.name), result.index,
+                result.x, result.y, result.width, result.height,
+                result.index, result.opacity / 100
+            ) for result in sample)
 
-            # 添加图层HTML
-            for result in results[:5]:  # 示例前5个图层
-                guide_content += f'''
-        &lt;!-- {result['name']} --&gt;
-        &lt;img src="{result['relative_path']}" 
-             alt="{result['name']}" 
-             class="layer-{result['index']}"&gt;
-                '''
-
-            guide_content += '''
-    &lt;/div&gt;
-&lt;/body&gt;
-&lt;/html&gt;
-                        </code></pre>
-                    </div>
+            parts.append(_GUIDE_CODE_MIDDLE)
 
-                    <div class="info-card">
-                        <h3>📋 实现步骤</h3>
-                        <p>1. 复制<code>images/</code>目录到您的项目</p>
-                        <p>2. 根据<code>metadata.json</code>中的位置信息设置CSS</p>
-                        <p>3. 使用绝对定位(position: absolute)布局所有元素</p>
-                        <p>4. 按z-index顺序排列元素（序号越大层级越高）</p>
-                        <p>5. 如需响应式，添加媒体查询调整容器尺寸</p>
-                    </div>
+            # 添加图层HTML
+            parts.extend(_GUIDE_LAYER_IMG.format_map({
+                'name': html.escape(result.name),
+                'src': html.escape(result.relative_path),
+                'i': result.index
+            }) for result in sample)
 
-                    <div class="footer">
-                        <p>🛠️ 生成时间: ''' + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + '''</p>
-                        <p>📄 详细说明: <a href="ai_summary.txt">ai_summary.txt</a> | 完整数据: <a href="metadata.json">metadata.json</a></p>
-                    </div>
-                </div>
+            parts.append(_GUIDE_FOOTER.substitute(generated_at=generated_at))
 
-                <script>
-                    // 简单的交互效果
-                    document.querySelectorAll('.layer-box').forEach(box => {{
-                        box.addEventListener('mouseenter', function() {{
-                            this.style.background = 'rgba(102, 126, 234, 0.3)';
-                            this.style.borderColor = '#667eea';
-                        }});
-                        box.addEventListener('mouseleave', function() {{
-                            this.style.background = 'rgba(102, 126, 234, 0.1)';
-                            this.style.borderColor = 'rgba(102, 126, 234, 0.5)';
-                        }});
-                    }});
-                </script>
-            </body>
-            </html>
-            '''
-
-            with open(guide_path, 'w', encoding='utf-8') as f:
-                f.write(guide_content)
+            guide_path.write_bytes(''.join(parts).encode('utf-8'))
 
             print(f"   ✅ 网页布局指南: {guide_path}")
 
@@ -1057,6 +1734,21 @@ def main():
 
   # 指定中文字体（避免文字乱码）
   python psd_to_web_ai.py design.psd ./output --font "fonts/simhei.ttf"
+
+  # 限制并行进程数
+  python psd_to_web_ai.py design.psd ./output --jobs 4
+
+  # 导出后用oxipng进一步压缩PNG
+  python psd_to_web_ai.py design.psd ./output --oxipng
+
+  # 用zlib最高压缩级别写PNG（文件更小，导出更慢）
+  python psd_to_web_ai.py design.psd ./output --png-level 9
+
+  # 只导出整张合成图（不逐图层提取）
+  python psd_to_web_ai.py design.psd ./output --flatten
+
+  # 只生成给AI的数据文件，不生成HTML页面
+  python psd_to_web_ai.py design.psd ./output --no-html
         '''
     )
 
@@ -1071,6 +1763,19 @@ def main():
                         help='展开智能对象 (实验性功能)')
     parser.add_argument('--font', default=None,
                         help='字体文件路径 (用于文字渲染)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='并行导出图层的进程数 (默认: CPU核心数，1为单进程)')
+    parser.add_argument('--quiet', action='store_true',
+                        help='不显示逐图层导出进度，只输出汇总信息')
+    parser.add_argument('--oxipng', action='store_true',
+                        help='导出后调用oxipng无损压缩PNG (需要单独安装oxipng)')
+    parser.add_argument('--png-level', type=int, default=1, choices=range(10), metavar='0-9',
+                        help='PNG的zlib压缩级别 (默认: 1，最快；9压缩率最高但编码慢数倍，'
+                             '文件约小15%%，也可用 --oxipng 在导出后再压缩)')
+    parser.add_argument('--flatten', action='store_true',
+                        help='只导出PSD内嵌的合成图 composite.png，跳过逐图层提取')
+    parser.add_argument('--no-html', action='store_true',
+                        help='不生成preview.html和web_layout_guide.html，只输出ai_summary.txt等数据文件')
 
     args = parser.parse_args()
 
@@ -1095,32 +1800,57 @@ def main():
             output_dir=args.output,
             export_invisible=args.invisible,
             expand_smart_objects=args.expand_smart,
-            font_path=args.font
+            font_path=args.font,
+            jobs=args.jobs,
+            png_compress_level=args.png_level,
+            quiet=args.quiet,
+            generate_html=not args.no_html
         )
 
+        # 只需要整张合成图时直接使用PSD内嵌的合成数据，不必解码每个图层
+        if args.flatten:
+            composite_path = extractor.export_composite()
+            if composite_path:
+                print(f"\n✅ 合成图: {composite_path}")
+                if args.oxipng:
+                    extractor.optimize_pngs([composite_path])
+                return 0
+            print("\n⚠️ PSD中没有内嵌合成图（保存时未勾选“最大兼容”），改为逐图层提取")
+
         # 提取所有图层
         results, layer_stats = extractor.extract_all_layers()
 
+        if results and args.oxipng:
+            extractor.optimize_pngs(result.absolute_path for result in results)
+
         # 生成元数据文件
         if results:
             extractor.generate_metadata(results, layer_stats)
 
-        # 输出总结
-        print(f"\n{'=' * 60}")
-        print("🎉 AI友好版导出完成!")
-        print(f"{'=' * 60}")
-        print(f"📁 输出目录: {extractor.output_dir.absolute()}")
-        print(f"🖼️  图片目录: {extractor.images_dir.relative_to(extractor.output_dir)}/")
-        print(f"\n📄 生成的文件:")
-        print(f"   • ai_summary.txt       - AI友好详细说明（可提供给AI生成网页）")
-        print(f"   • metadata.json        - 完整结构化数据")
-        print(f"   • web_layout_guide.html - 网页布局实现指南")
-        print(f"   • preview.html         - 素材预览页面")
-        print(f"   • metadata.csv         - 表格格式数据")
-        print(f"\n💡 使用方法:")
-        print(f"   1. 将 ai_summary.txt 提供给AI（如ChatGPT、Claude等）")
-        print(f"   2. AI会根据详细说明生成与PSD一致的HTML/CSS代码")
-        print(f"   3. 参考 web_layout_guide.html 中的实现示例")
+        # 输出总结：先拼成一个字符串，再一次性写出
+        lines = [
+            f"\n{'=' * 60}",
+            "🎉 AI友好版导出完成!",
+            "=" * 60,
+            f"📁 输出目录: {extractor.output_dir.absolute()}",
+            f"🖼️  图片目录: {extractor.images_dir.relative_to(extractor.output_dir)}/",
+            "\n📄 生成的文件:",
+            "   • ai_summary.txt       - AI友好详细说明（可提供给AI生成网页）",
+            "   • metadata.json        - 完整结构化数据"
+        ]
+        if extractor.generate_html:
+            lines.append("   • web_layout_guide.html - 网页布局实现指南")
+            lines.append("   • preview.html         - 素材预览页面")
+        lines += [
+            "   • metadata.csv         - 表格格式数据",
+            "\n💡 使用方法:",
+            "   1. 将 ai_summary.txt 提供给AI（如ChatGPT、Claude等）",
+            "   2. AI会根据详细说明生成与PSD一致的HTML/CSS代码"
+        ]
+        if extractor.generate_html:
+            lines.append("   3. 参考 web_layout_guide.html 中的实现示例")
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
 
         return 0
 
@@ -1223,20 +1953,21 @@ def interactive_mode():
         if results:
             extractor.generate_metadata(results, layer_stats)
 
-        # 输出总结
-        print(f"\n{'=' * 60}")
-        print("🎉 AI友好版导出完成!")
-        print(f"{'=' * 60}")
-        print(f"📁 输出目录: {extractor.output_dir.absolute()}")
-        print(f"\n📄 关键文件:")
-        print(f"   1. ai_summary.txt - 可直接复制给AI生成网页代码")
-        print(f"   2. web_layout_guide.html - 网页布局实现示例")
-        print(f"   3. preview.html - 素材预览")
-
-        # 显示下一步操作
-        print(f"\n💡 下一步操作:")
-        print(f"   将 ai_summary.txt 内容复制到AI对话中，并提示:")
-        print(f"   \"根据这个PSD文件说明，生成一个HTML网页，还原设计稿\"")
+        # 输出总结和下一步操作，拼成一个字符串一次性写出
+        sys.stdout.write('\n'.join([
+            f"\n{'=' * 60}",
+            "🎉 AI友好版导出完成!",
+            "=" * 60,
+            f"📁 输出目录: {extractor.output_dir.absolute()}",
+            "\n📄 关键文件:",
+            "   1. ai_summary.txt - 可直接复制给AI生成网页代码",
+            "   2. web_layout_guide.html - 网页布局实现示例",
+            "   3. preview.html - 素材预览",
+            "\n💡 下一步操作:",
+            "   将 ai_summary.txt 内容复制到AI对话中，并提示:",
+            "   \"根据这个PSD文件说明，生成一个HTML网页，还原设计稿\""
+        ]) + '\n')
+        sys.stdout.flush()
 
         # 询问是否打开目录
         if sys.platform == 'win32':
@@ -1263,6 +1994,11 @@ if __name__ == "__main__":
     except ImportError:
         print("❌ 缺少必要依赖")
         print("请运行: pip install psd-tools pillow")
+        print("如需更快的栅格化和PNG编码，可改装Pillow-SIMD（CPU需支持AVX2，构建机上需有C编译器）:")
+        print("  pip uninstall pillow && CC=\"cc -mavx2\" pip install pillow-simd")
         sys.exit(1)
 
+    # Windows下打包成exe时，进程池的子进程需要由此入口接管
+    multiprocessing.freeze_support()
+
     sys.exit(main())
\ No newline at end of file